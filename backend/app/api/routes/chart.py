@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta
 
 from fastapi import APIRouter, HTTPException
@@ -15,32 +16,36 @@ router = APIRouter()
 
 
 @router.post("/load", response_model=ChartLoadResponse)
-def load_chart_data(request: ChartLoadRequest) -> ChartLoadResponse:
+async def load_chart_data(request: ChartLoadRequest) -> ChartLoadResponse:
     exchange_name = request.exchange or infer_exchange_name(request.data_file)
     since_ms, until_ms = _date_range_to_ms(request.start_date, request.end_date)
 
-    chart_frame = fetch_ohlcv_data(
-        exchange_name=exchange_name,
-        symbol=request.symbol,
-        timeframe=request.timeframe,
-        since=since_ms,
-        until=until_ms,
-        indicator_settings=request.indicator_settings,
+    # K线与成交记录互不依赖，并行获取；成交记录仍走同步鉴权客户端，放在线程里执行。
+    chart_frame, positions = await asyncio.gather(
+        fetch_ohlcv_data(
+            exchange_name=exchange_name,
+            symbol=request.symbol,
+            timeframe=request.timeframe,
+            since=since_ms,
+            until=until_ms,
+            indicator_settings=request.indicator_settings,
+        ),
+        asyncio.to_thread(
+            _load_positions,
+            exchange_name=exchange_name,
+            data_file=request.data_file,
+            symbol=request.symbol,
+            since_ms=since_ms,
+            until_ms=until_ms,
+        ),
     )
     if chart_frame.empty:
         raise HTTPException(status_code=404, detail="未获取到K线数据")
 
-    positions = _load_positions(
-        exchange_name=exchange_name,
-        data_file=request.data_file,
-        symbol=request.symbol,
-        since_ms=since_ms,
-        until_ms=until_ms,
-    )
     data_file_path = resolve_data_file(request.data_file)
 
     return ChartLoadResponse(
-        chart=prepare_chart_payload(chart_frame),
+        chart=await asyncio.to_thread(prepare_chart_payload, chart_frame, request.indicator_settings),
         positions=positions,
         summary=SummaryResponse(
             time_range=f"{request.start_date} -> {request.end_date}",
@@ -57,19 +62,21 @@ def load_chart_data(request: ChartLoadRequest) -> ChartLoadResponse:
 
 
 @router.post("/load-more")
-def load_more_chart_data(request: LoadMoreRequest) -> dict:
+async def load_more_chart_data(request: LoadMoreRequest) -> dict:
     exchange_name = request.exchange or "binance"
     timeframe_increment_ms = TIMEFRAME_INCREMENT_MS.get(request.timeframe)
     if timeframe_increment_ms is None:
         raise HTTPException(status_code=400, detail="不支持的周期")
 
-    return load_more_ohlcv(
+    return await load_more_ohlcv(
         exchange_name=exchange_name,
         symbol=request.symbol,
         timeframe=request.timeframe,
         last_timestamp=request.last_timestamp,
         candles_to_load=request.candles_to_load,
         timeframe_increment_ms=timeframe_increment_ms,
+        indicator_settings=request.indicator_settings,
+        first_timestamp=request.first_timestamp,
     )
 
 
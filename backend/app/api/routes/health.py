@@ -2,13 +2,23 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter
 
+from backend.app.services.cache import get_cache_stats
+from backend.app.services.chart import indicator_memo, ohlcv_flight
+from backend.app.services.rate_limit import rate_limiter
+from backend.app.services.route_health import route_health
+
 
 router = APIRouter()
 
 
 @router.get("/health")
-def health_check() -> dict[str, str]:
+def health_check() -> dict:
     return {
         "status": "ok",
         "timestamp": datetime.now(timezone.utc).isoformat(),
+        "ohlcv_memory_cache": get_cache_stats(),
+        "ohlcv_single_flight": ohlcv_flight.stats(),
+        "indicator_memo": indicator_memo.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "exchange_routes": route_health.stats(),
     }
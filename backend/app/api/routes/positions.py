@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 
-from backend.app.schemas.position import RebuildRequest, RebuildResponse
+from backend.app.schemas.position import RebuildPlanRequest, RebuildPlanResponse, RebuildRequest, RebuildResponse
 from backend.app.services.rebuild import run_rebuild
+from backend.app.services.rebuild_plan import plan_rebuild
 
 
 router = APIRouter()
@@ -13,3 +14,20 @@ def rebuild_positions(request: RebuildRequest) -> RebuildResponse:
         return RebuildResponse(**run_rebuild(request))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
+
+
+@router.post("/plan", response_model=RebuildPlanResponse)
+def plan_rebuild_positions(request: RebuildPlanRequest) -> RebuildPlanResponse:
+    try:
+        plan = plan_rebuild(
+            request.exchange,
+            request.start_date,
+            request.end_date,
+            threads=request.threads,
+            discover_symbols=not request.full_scan,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc)) from exc
+    return RebuildPlanResponse(**plan)
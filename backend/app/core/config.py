@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date, datetime, timedelta
 from pathlib import Path
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -24,10 +24,14 @@ class Settings(BaseSettings):
     app_use_reloader: bool = False
 
     exchange_proxy_url: str | None = None
+    route_probe_seconds: int = 30
     ccxt_enable_rate_limit: bool = True
+    exchange_max_concurrency: int = 8
+    rate_limit_headroom: float = 0.9
     ccxt_timeout_ms: int = 60000
     ccxt_recv_window: int = 60000
     ccxt_verify_ssl: bool = False
+    exchange_time_sync_minutes: int = 30
     ccxt_user_agent: str = (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
         "AppleWebKit/537.36 (KHTML, like Gecko) "
@@ -43,6 +47,12 @@ class Settings(BaseSettings):
     okx_api_passphrase: str | None = None
     okx_default_type: str = "swap"
 
+    exchange_replay: bool = False
+    exchange_replay_dir: Path | None = None
+    exchange_replay_latency_ms: int = 50
+    exchange_replay_rate_limit_every: int = 0
+    exchange_replay_url: str | None = None
+
     chart_default_symbol: str = "NXPC/USDT:USDT"
     chart_fallback_symbol: str = "NXPC/USDT:USDT"
     chart_default_timeframe: str = "30m"
@@ -50,18 +60,56 @@ class Settings(BaseSettings):
     chart_default_end_date: date | None = None
     chart_min_trades: int = 5
 
+    ohlcv_memory_budget_mb: int = 256
+    indicator_memory_budget_mb: int = 64
+    indicator_disk_budget_mb: int = 512
+    markets_refresh_hours: int = 12
+
     position_default_exchange: str = "binance"
     position_default_threads: int = 5
     position_max_retries: int = 3
 
+    @field_validator("exchange_replay_dir", mode="before")
+    @classmethod
+    def _empty_replay_dir(cls, value):
+        # .env 里留空时按未配置处理，否则 Path("") 会变成当前工作目录。
+        return value or None
+
     @property
     def data_dir(self) -> Path:
         return BASE_DIR / "data"
 
     @property
     def cache_dir(self) -> Path:
+        # 回放模式的市场列表、K线、覆盖区间与成交档案都是合成数据，与真实缓存分开存放，避免之后的实盘会话当真。
+        if self.exchange_replay or self.exchange_replay_url:
+            return BASE_DIR / "cache" / "replay-run"
         return BASE_DIR / "cache"
 
+    @property
+    def ohlcv_cache_dir(self) -> Path:
+        return self.cache_dir / "ohlcv"
+
+    @property
+    def cache_index_file(self) -> Path:
+        return self.cache_dir / "index.sqlite"
+
+    @property
+    def markets_cache_dir(self) -> Path:
+        return self.cache_dir / "markets"
+
+    @property
+    def trade_archive_file(self) -> Path:
+        return self.cache_dir / "trades.sqlite"
+
+    @property
+    def rate_limit_state_dir(self) -> Path:
+        return self.cache_dir / "ratelimit"
+
+    @property
+    def indicator_cache_dir(self) -> Path:
+        return self.cache_dir / "indicators"
+
     @property
     def frontend_dist_dir(self) -> Path:
         return BASE_DIR / "frontend" / "dist"
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -10,13 +11,22 @@ from fastapi.staticfiles import StaticFiles
 from backend.app.api import api_router
 from backend.app.core.config import settings
 from backend.app.core.logging import configure_logging
+from backend.app.services.exchange import close_async_exchanges
 
 
 configure_logging()
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    yield
+    await close_async_exchanges()
+
+
 app = FastAPI(
     title="BactTrading API",
     version="2.0.0",
+    lifespan=lifespan,
 )
 app.add_middleware(
     CORSMiddleware,
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+from typing import Annotated, Literal
+
 from pydantic import BaseModel, Field
 
 
+IndicatorName = Literal["ema", "sma", "rsi", "macd", "bollinger", "atr", "vwap"]
+Period = Annotated[int, Field(ge=1, le=500)]
+
+
 class EmaSettings(BaseModel):
-    periods: list[int] = Field(default_factory=lambda: [20, 50, 200], min_length=1, max_length=6)
+    periods: list[Period] = Field(default_factory=lambda: [20, 50, 200], min_length=1, max_length=6)
+
+
+class SmaSettings(BaseModel):
+    periods: list[Period] = Field(default_factory=lambda: [20], min_length=1, max_length=6)
 
 
 class RsiSettings(BaseModel):
@@ -17,10 +27,30 @@ class MacdSettings(BaseModel):
     signal_period: int = Field(default=9, ge=1, le=500)
 
 
+class BollingerSettings(BaseModel):
+    period: int = Field(default=20, ge=2, le=500)
+    std_dev: float = Field(default=2.0, gt=0, le=10)
+
+
+class AtrSettings(BaseModel):
+    period: int = Field(default=14, ge=1, le=500)
+
+
+class VwapSettings(BaseModel):
+    # day：每个 UTC 自然日重新累计；none：从图表首根K线一直累计。
+    anchor: Literal["day", "none"] = "day"
+
+
 class IndicatorSettings(BaseModel):
     ema: EmaSettings = Field(default_factory=EmaSettings)
+    sma: SmaSettings = Field(default_factory=SmaSettings)
     rsi: RsiSettings = Field(default_factory=RsiSettings)
     macd: MacdSettings = Field(default_factory=MacdSettings)
+    bollinger: BollingerSettings = Field(default_factory=BollingerSettings)
+    atr: AtrSettings = Field(default_factory=AtrSettings)
+    vwap: VwapSettings = Field(default_factory=VwapSettings)
+    # 只计算、只返回这里列出的指标；缺省与旧版接口一致。
+    enabled: list[IndicatorName] = Field(default_factory=lambda: ["ema", "rsi", "macd"])
 
 
 class ChartLoadRequest(BaseModel):
@@ -39,6 +69,9 @@ class LoadMoreRequest(BaseModel):
     last_timestamp: int
     candles_to_load: int = 1000
     exchange: str | None = None
+    # 图表首根K线时间：与末根时间一起定位指标的递推状态，缺省时按最近的本地K线回放。
+    first_timestamp: int | None = None
+    indicator_settings: IndicatorSettings = Field(default_factory=IndicatorSettings)
 
 
 class SummaryResponse(BaseModel):
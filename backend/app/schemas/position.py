@@ -16,3 +16,44 @@ class RebuildResponse(BaseModel):
     exchange: str
     start_date: str
     end_date: str
+
+
+class RebuildPlanRequest(BaseModel):
+    exchange: str = "binance"
+    start_date: str
+    end_date: str
+    threads: int = 5
+    full_scan: bool = False
+
+
+class RebuildPlanPhase(BaseModel):
+    name: str
+    requests: int
+    weight: float
+    bucket: str
+    latency_seconds: float
+    rate_limit_seconds: float
+    seconds: float
+    bottleneck: str
+    share: float
+
+
+class RebuildPlanResponse(BaseModel):
+    exchange: str
+    start_date: str
+    end_date: str
+    threads: int
+    symbols: int
+    symbol_source: str
+    candidate_symbols: int
+    windows_per_symbol: int
+    estimated_trades: int
+    archive_covered: bool
+    request_latency_ms: float
+    total_requests: int
+    total_weight: dict[str, float]
+    estimated_seconds: float
+    dominant_phase: str | None
+    suggested_threads: int
+    phases: list[RebuildPlanPhase]
+    notes: list[str]
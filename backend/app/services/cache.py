@@ -2,120 +2,479 @@ from __future__ import annotations
 
 import hashlib
 import logging
-import pickle
+import sqlite3
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 from backend.app.core.config import settings
+from backend.app.core.constants import TIMEFRAME_INCREMENT_MS
+from backend.app.services.cache_index import CacheIndex
+from backend.app.services.file_lock import FileLock, atomic_write
+from backend.app.services.memory_cache import ByteBudgetLRU
 
 
 logger = logging.getLogger(__name__)
 settings.cache_dir.mkdir(parents=True, exist_ok=True)
-cache_lock = threading.Lock()
+hot_ohlcv_cache = ByteBudgetLRU(settings.ohlcv_memory_budget_mb * 1024 * 1024)
+cache_index = CacheIndex(settings.cache_index_file, (settings.ohlcv_cache_dir, settings.indicator_cache_dir))
+compaction_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-compaction")
+_pending_compactions: set[tuple[str, str, str, str]] = set()
+_pending_compactions_lock = threading.Lock()
 
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+OHLCV_SCHEMA = pa.schema(
+    [
+        ("timestamp", pa.int64()),
+        ("open", pa.float64()),
+        ("high", pa.float64()),
+        ("low", pa.float64()),
+        ("close", pa.float64()),
+        ("volume", pa.float64()),
+    ]
+)
+ROW_GROUP_SIZE = 4096
+DAY_MS = 24 * 60 * 60 * 1000
+OPEN_CANDLE_MIN_TTL_MS = 15 * 1000
+OPEN_CANDLE_MAX_TTL_MS = 5 * 60 * 1000
+LOCK_FILE_NAME = ".lock"
+COMPACTION_SEGMENT_THRESHOLD = 8
 
-def get_cache_key(
+
+def clean_symbol(symbol: str) -> str:
+    return symbol.replace("/", "_").replace(":", "_")
+
+
+def get_market_dir(exchange_name: str, symbol: str, timeframe: str) -> Path:
+    return settings.ohlcv_cache_dir / exchange_name.lower() / clean_symbol(symbol) / timeframe
+
+
+def empty_ohlcv_frame() -> pd.DataFrame:
+    return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+
+def _to_epoch_ms(timestamps: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(timestamps):
+        return timestamps.astype("datetime64[ms]").astype("int64")
+    return timestamps.astype("int64")
+
+
+def _month_keys(since: int, until: int) -> list[str]:
+    periods = pd.period_range(
+        pd.Timestamp(since, unit="ms"),
+        pd.Timestamp(until, unit="ms"),
+        freq="M",
+    )
+    return [period.strftime("%Y-%m") for period in periods]
+
+
+def _market_key(exchange_name: str, symbol: str, timeframe: str) -> tuple[str, str, str]:
+    return exchange_name.lower(), clean_symbol(symbol), timeframe
+
+
+def _partition_rows(exchange_name: str, symbol: str, timeframe: str, since: int | None, until: int | None) -> list[sqlite3.Row]:
+    months = None if since is None or until is None else _month_keys(since, until)
+    return cache_index.get_partitions(*_market_key(exchange_name, symbol, timeframe), months=months)
+
+
+def _partition_path(row: sqlite3.Row) -> Path:
+    return settings.ohlcv_cache_dir / row["path"]
+
+
+def _rows_by_month(rows: list[sqlite3.Row]) -> dict[str, list[sqlite3.Row]]:
+    months: dict[str, list[sqlite3.Row]] = {}
+    for row in rows:
+        months.setdefault(row["month"], []).append(row)
+    return months
+
+
+def _merge_segments(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """按 seq 顺序拼接同月文件，同一时间戳保留最后写入的一条。"""
+    if len(frames) == 1:
+        return frames[0]
+    merged = pd.concat(frames, ignore_index=True)
+    return merged.drop_duplicates("timestamp", keep="last").sort_values("timestamp").reset_index(drop=True)
+
+
+def _read_month(rows: list[sqlite3.Row], columns: list[str], filters: list | None = None) -> pd.DataFrame:
+    return _merge_segments(
+        [pq.read_table(_partition_path(row), columns=columns, filters=filters).to_pandas() for row in rows]
+    )
+
+
+def _load_hot_months(market_key: tuple[str, str, str], rows: list[sqlite3.Row]) -> dict[str, tuple[tuple, dict]]:
+    """返回 ``{月份: (文件校验和元组, 列数组)}``。
+
+    命中内存且文件集合未变的月份直接复用已解码数组；只是新增了追加段时，只解码新段再合并。
+    """
+    months: dict[str, tuple[tuple, dict]] = hot_ohlcv_cache.get(market_key) or {}
+    updated = dict(months)
+    changed = False
+    for month, month_rows in _rows_by_month(rows).items():
+        token = tuple(row["checksum"] for row in month_rows)
+        cached_token, cached_arrays = months.get(month, ((), None))
+        if cached_token == token:
+            continue
+
+        if cached_arrays is not None and cached_token and token[: len(cached_token)] == cached_token:
+            new_rows = month_rows[len(cached_token):]
+            frame = _merge_segments([pd.DataFrame(cached_arrays), _read_month(new_rows, OHLCV_COLUMNS)])
+        else:
+            frame = _read_month(month_rows, OHLCV_COLUMNS)
+        updated[month] = (token, {column: frame[column].to_numpy() for column in OHLCV_COLUMNS})
+        changed = True
+
+    if changed:
+        size = sum(array.nbytes for _, arrays in updated.values() for array in arrays.values())
+        hot_ohlcv_cache.put(market_key, updated, size)
+    return updated
+
+
+def _scan_partitions(rows: list[sqlite3.Row], since: int | None, until: int | None, columns: list[str]) -> pd.DataFrame:
+    filters = []
+    if since is not None:
+        filters.append(("timestamp", ">=", since))
+    if until is not None:
+        filters.append(("timestamp", "<=", until))
+
+    frames = [_read_month(month_rows, columns, filters or None) for month_rows in _rows_by_month(rows).values()]
+    return pd.concat(frames, ignore_index=True)
+
+
+def read_ohlcv(
+    exchange_name: str,
     symbol: str,
     timeframe: str,
+    since: int | None = None,
+    until: int | None = None,
+    columns: list[str] | None = None,
+) -> pd.DataFrame:
+    """按时间范围读取列式缓存，只解码命中的月份分区、行组和列。
+
+    开启内存预算时，整月解码后的数组留在进程内 LRU 中，重复读取只做切片。
+    """
+    columns = columns or OHLCV_COLUMNS
+    if "timestamp" not in columns:
+        columns = ["timestamp", *columns]
+
+    df = None
+    for attempt in range(2):
+        rows = _partition_rows(exchange_name, symbol, timeframe, since, until)
+        if not rows:
+            return pd.DataFrame(columns=columns)
+        try:
+            df = _read_rows(_market_key(exchange_name, symbol, timeframe), rows, since, until, columns)
+            break
+        except FileNotFoundError:
+            # 查询索引与打开文件之间恰好发生了压缩，重新查询一次即可拿到新文件。
+            if attempt:
+                raise
+        except Exception as exc:
+            logger.error("读取缓存失败: %s", exc)
+            return pd.DataFrame(columns=columns)
+
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def _read_rows(
+    market_key: tuple[str, str, str],
+    rows: list[sqlite3.Row],
     since: int | None,
     until: int | None,
-    indicator_signature: str = "default",
-) -> str:
-    clean_symbol = symbol.replace("/", "_").replace(":", "_")
-    hash_part = hashlib.md5(f"{since}_{until}_{indicator_signature}".encode()).hexdigest()[:8]
-    return f"{clean_symbol}_{timeframe}_{hash_part}"
-
-
-def get_cached_data(cache_key: str) -> pd.DataFrame | None:
-    cache_file = settings.cache_dir / f"{cache_key}.pkl"
-    if cache_file.exists():
-        file_mod_time = cache_file.stat().st_mtime
-        if time.time() - file_mod_time < 24 * 3600:
-            try:
-                with cache_file.open("rb") as file:
-                    return pickle.load(file)
-            except Exception as exc:
-                logger.error("读取缓存失败: %s", exc)
-
-    main_key = cache_key.rsplit("_", 1)[0] if "_" in cache_key else cache_key
-    candidates: list[tuple[Path, float]] = []
-    for file_path in settings.cache_dir.glob(f"{main_key}_*.pkl"):
-        if time.time() - file_path.stat().st_mtime < 24 * 3600:
-            candidates.append((file_path, file_path.stat().st_mtime))
-
-    if candidates:
-        candidates.sort(key=lambda item: item[1], reverse=True)
-        with candidates[0][0].open("rb") as file:
-            return pickle.load(file)
-
-    return None
-
-
-def save_to_cache(cache_key: str, data: pd.DataFrame) -> None:
-    with cache_lock:
-        cache_file = settings.cache_dir / f"{cache_key}.pkl"
-        with cache_file.open("wb") as file:
-            pickle.dump(data, file)
-
-
-def append_to_cache(symbol: str, timeframe: str, new_data: pd.DataFrame) -> str | None:
-    main_key = f"{symbol.replace('/', '_').replace(':', '_')}_{timeframe}"
-    candidates: list[tuple[Path, float]] = []
-    for file_path in settings.cache_dir.glob(f"{main_key}_*.pkl"):
-        candidates.append((file_path, file_path.stat().st_mtime))
-
-    if candidates:
-        candidates.sort(key=lambda item: item[1], reverse=True)
-        newest_file = candidates[0][0]
-        with newest_file.open("rb") as file:
-            existing_data = pickle.load(file)
-
-        if not existing_data.empty and not new_data.empty:
-            last_timestamp = existing_data["timestamp"].max()
-            new_data = new_data[new_data["timestamp"] > last_timestamp]
-            if new_data.empty:
-                return newest_file.stem
-
-        combined = pd.concat([existing_data, new_data], ignore_index=True).sort_values("timestamp").reset_index(drop=True)
-        with cache_lock:
-            with newest_file.open("wb") as file:
-                pickle.dump(combined, file)
-        return newest_file.stem
-
-    cache_key = get_cache_key(
-        symbol,
-        timeframe,
-        int(new_data["timestamp"].min().timestamp() * 1000),
-        int(new_data["timestamp"].max().timestamp() * 1000),
-    )
-    save_to_cache(cache_key, new_data)
-    return cache_key
+    columns: list[str],
+) -> pd.DataFrame:
+    if not hot_ohlcv_cache.max_bytes:
+        return _scan_partitions(rows, since, until, columns)
 
+    months = _load_hot_months(market_key, rows)
+    month_keys = list(_rows_by_month(rows))
+    arrays = {column: np.concatenate([months[month][1][column] for month in month_keys]) for column in columns}
+    lower = 0 if since is None else np.searchsorted(arrays["timestamp"], since, side="left")
+    upper = len(arrays["timestamp"]) if until is None else np.searchsorted(arrays["timestamp"], until, side="right")
+    return pd.DataFrame({column: array[lower:upper] for column, array in arrays.items()})
 
-def list_cache_files() -> dict[str, list[dict]]:
-    cache_files_by_symbol: dict[str, list[dict]] = {}
-    for file_path in settings.cache_dir.glob("*.pkl"):
-        parts = file_path.stem.split("_")
-        if len(parts) < 3:
-            continue
 
-        if len(parts) >= 4 and parts[1] == "USDT":
-            symbol = f"{parts[0]}/USDT"
-            timeframe = parts[2]
+def get_cache_stats() -> dict[str, int]:
+    return hot_ohlcv_cache.stats()
+
+
+def open_candle_ttl_ms(timeframe: str) -> int:
+    """未收盘K线的复验间隔：周期越短越快过期，但限制在 15 秒到 5 分钟之间。"""
+    increment = TIMEFRAME_INCREMENT_MS.get(timeframe, 0)
+    return max(OPEN_CANDLE_MIN_TTL_MS, min(increment // 12, OPEN_CANDLE_MAX_TTL_MS))
+
+
+def get_coverage(exchange_name: str, symbol: str, timeframe: str) -> list[tuple[int, int]]:
+    """返回有效的已缓存区间（闭区间，毫秒），按起点排序并合并重叠部分。
+
+    已收盘部分永久有效；登记时仍可能在变化的尾部只在短 TTL 内有效。
+    """
+    now_ms = int(time.time() * 1000)
+    ttl_ms = open_candle_ttl_ms(timeframe)
+    intervals = [
+        (row["start_ts"], row["end_ts"])
+        for row in cache_index.get_coverage(*_market_key(exchange_name, symbol, timeframe))
+        if row["final"] or now_ms - row["fetched_at"] < ttl_ms
+    ]
+
+    merged: list[tuple[int, int]] = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
         else:
-            symbol = f"{parts[0]}_{parts[1]}".replace("_", "/")
-            timeframe = parts[2]
+            merged.append((start, end))
+    return merged
+
 
-        cache_files_by_symbol.setdefault(symbol, []).append(
+def record_coverage(exchange_name: str, symbol: str, timeframe: str, start: int, end: int) -> None:
+    """登记 ``[start, end]`` 内的K线已全部写入缓存，覆盖该区间内较旧的登记。
+
+    开盘时间早于 ``now - 周期`` 的K线已经收盘，标记为 final 永不过期；其余尾部按周期短 TTL 复验。
+    """
+    fetched_at = int(time.time() * 1000)
+    end = min(end, fetched_at)
+    if end < start:
+        return
+
+    final_end = min(end, fetched_at - TIMEFRAME_INCREMENT_MS.get(timeframe, 0))
+    new_intervals = []
+    if final_end >= start:
+        new_intervals.append({"start": start, "end": final_end, "fetched_at": fetched_at, "final": True})
+    if end > final_end:
+        new_intervals.append({"start": max(start, final_end + 1), "end": end, "fetched_at": fetched_at, "final": False})
+
+    cache_index.replace_coverage(*_market_key(exchange_name, symbol, timeframe), start, end, new_intervals)
+
+
+def _gap_has_candle(start: int, end: int, increment: int) -> bool:
+    if end < start:
+        return False
+    if not increment or DAY_MS % increment:
+        return True
+    first_open = -(-start // increment) * increment
+    return first_open <= end
+
+
+def get_missing_ranges(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    since: int,
+    until: int,
+) -> list[tuple[int, int]]:
+    """计算 ``[since, until]`` 中未被缓存覆盖、需要向交易所补拉的区间。"""
+    until = min(until, int(time.time() * 1000))
+    increment = TIMEFRAME_INCREMENT_MS.get(timeframe, 0)
+    missing: list[tuple[int, int]] = []
+    cursor = since
+    for start, end in get_coverage(exchange_name, symbol, timeframe):
+        if end < cursor:
+            continue
+        if start > until:
+            break
+        if _gap_has_candle(cursor, start - 1, increment):
+            missing.append((cursor, start - 1))
+        cursor = end + 1
+        if cursor > until:
+            break
+    if _gap_has_candle(cursor, until, increment):
+        missing.append((cursor, until))
+    return missing
+
+
+def get_cached_ohlcv(
+    exchange_name: str,
+    symbol: str,
+    timeframe: str,
+    since: int | None,
+    until: int | None,
+) -> pd.DataFrame | None:
+    if since is None or until is None:
+        return None
+    if get_missing_ranges(exchange_name, symbol, timeframe, since, until):
+        return None
+    return read_ohlcv(exchange_name, symbol, timeframe, since, until)
+
+
+def _write_partition_file(
+    market_key: tuple[str, str, str],
+    symbol: str,
+    month: str,
+    seq: int,
+    cache_file: Path,
+    month_frame: pd.DataFrame,
+) -> dict:
+    """原子写出一个分区文件，返回待登记到索引的元数据。"""
+    table = pa.Table.from_pandas(month_frame, schema=OHLCV_SCHEMA, preserve_index=False)
+    atomic_write(cache_file, lambda temp_path: pq.write_table(table, temp_path, row_group_size=ROW_GROUP_SIZE))
+
+    timestamps = month_frame["timestamp"]
+    return {
+        "exchange": market_key[0],
+        "symbol_key": market_key[1],
+        "symbol": symbol,
+        "timeframe": market_key[2],
+        "month": month,
+        "seq": seq,
+        "path": cache_file.relative_to(settings.ohlcv_cache_dir).as_posix(),
+        "min_ts": int(timestamps.iloc[0]),
+        "max_ts": int(timestamps.iloc[-1]),
+        "row_count": len(month_frame),
+        "byte_size": cache_file.stat().st_size,
+        "checksum": hashlib.blake2b(cache_file.read_bytes(), digest_size=16).hexdigest(),
+        "updated_at": int(time.time() * 1000),
+    }
+
+
+def save_ohlcv(exchange_name: str, symbol: str, timeframe: str, data: pd.DataFrame) -> None:
+    """把K线以不可变追加段写入 ``exchange/symbol/timeframe/YYYY-MM.<seq>.parquet``。
+
+    追加只写新行，代价与新增行数成正比；段号在索引写事务内分配，段文件在同一事务内通过
+    临时文件 + fsync + rename 原子落盘并登记，并发写入不会互相覆盖。同月段数超过阈值后由后台线程压缩成一个文件。
+    """
+    if data.empty:
+        return
+
+    frame = data[OHLCV_COLUMNS].copy()
+    frame["timestamp"] = _to_epoch_ms(frame["timestamp"])
+    datetimes = pd.to_datetime(frame["timestamp"], unit="ms")
+    frame["month"] = datetimes.dt.year * 100 + datetimes.dt.month
+    market_key = _market_key(exchange_name, symbol, timeframe)
+    market_dir = get_market_dir(exchange_name, symbol, timeframe)
+
+    for month_id, month_frame in frame.groupby("month"):
+        month = f"{month_id // 100:04d}-{month_id % 100:02d}"
+        month_frame = month_frame[OHLCV_COLUMNS].drop_duplicates("timestamp", keep="last").sort_values("timestamp")
+        with cache_index.transaction() as connection:
+            seq = cache_index.next_seq(connection, *market_key, month)
+            row = _write_partition_file(market_key, symbol, month, seq, market_dir / f"{month}.{seq}.parquet", month_frame)
+            cache_index.insert_partition(connection, **row)
+        if cache_index.count_partition_files(*market_key, month) > COMPACTION_SEGMENT_THRESHOLD:
+            _schedule_compaction(market_key, symbol, month)
+
+
+def _schedule_compaction(market_key: tuple[str, str, str], symbol: str, month: str) -> None:
+    job_key = (*market_key, month)
+    with _pending_compactions_lock:
+        if job_key in _pending_compactions:
+            return
+        _pending_compactions.add(job_key)
+    compaction_executor.submit(_run_compaction, market_key, symbol, month)
+
+
+def _run_compaction(market_key: tuple[str, str, str], symbol: str, month: str) -> None:
+    try:
+        compact_month(market_key, symbol, month)
+    except Exception as exc:
+        logger.warning("压缩缓存分区失败: %s %s (%s)", market_key, month, exc)
+    finally:
+        with _pending_compactions_lock:
+            _pending_compactions.discard((*market_key, month))
+
+
+def compact_month(market_key: tuple[str, str, str], symbol: str, month: str) -> None:
+    """把某月的全部段合并成一个文件。
+
+    新文件沿用被合并段中最大的 seq，压缩期间新追加的段 seq 更大，仍然优先生效。
+    市场级文件锁保证同一时间只有一个进程在压缩。
+    """
+    market_dir = settings.ohlcv_cache_dir.joinpath(*market_key)
+    with FileLock(market_dir / LOCK_FILE_NAME):
+        rows = cache_index.get_partitions(*market_key, months=[month])
+        if len(rows) <= 1:
+            return
+
+        seq = rows[-1]["seq"]
+        compacted_file = market_dir / f"{month}.{seq}.compact.parquet"
+        compacted = _write_partition_file(market_key, symbol, month, seq, compacted_file, _read_month(rows, OHLCV_COLUMNS))
+        with cache_index.transaction() as connection:
+            cache_index.delete_partitions(connection, rows)
+            cache_index.insert_partition(connection, **compacted)
+        for row in rows:
+            path = _partition_path(row)
+            if path != compacted_file:
+                path.unlink(missing_ok=True)
+
+
+def fingerprint_ohlcv(data: pd.DataFrame) -> str:
+    """对K线内容做摘要，相同行集合得到相同指纹，作为派生指标缓存的键。"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(_to_epoch_ms(data["timestamp"]).to_numpy()).tobytes())
+    for column in OHLCV_COLUMNS[1:]:
+        digest.update(np.ascontiguousarray(data[column].to_numpy(dtype="float64")).tobytes())
+    return digest.hexdigest()
+
+
+def quick_fingerprint_ohlcv(data: pd.DataFrame) -> tuple:
+    """只看行数、首尾时间和末根K线的轻量指纹，开销与行数无关。
+
+    同一条序列里已收盘的K线不会再变，能变的只有末根未收盘K线和补齐的缺口（会改变行数），
+    所以只能与 (交易所, 交易对, 周期) 一起作键；不同序列之间请用 :func:`fingerprint_ohlcv`。
+    """
+    if data.empty:
+        return (0,)
+    timestamps = _to_epoch_ms(data["timestamp"].iloc[[0, -1]])
+    last = data.iloc[-1]
+    return (len(data), int(timestamps.iloc[0]), int(timestamps.iloc[1]), *(float(last[column]) for column in OHLCV_COLUMNS[1:]))
+
+
+def _indicator_file_name(fingerprint: str, params_key: str) -> str:
+    params_hash = hashlib.md5(params_key.encode()).hexdigest()[:12]
+    return f"{fingerprint}_{params_hash}.parquet"
+
+
+def load_indicator_frame(fingerprint: str, params_key: str) -> pd.DataFrame | None:
+    """读取与K线逐行对齐的指标列，不包含任何K线列。"""
+    file_name = _indicator_file_name(fingerprint, params_key)
+    if not cache_index.touch_indicator_frame(file_name, int(time.time() * 1000)):
+        return None
+    try:
+        return pq.read_table(settings.indicator_cache_dir / file_name).to_pandas()
+    except Exception as exc:
+        logger.warning("读取指标缓存失败: %s (%s)", file_name, exc)
+        return None
+
+
+def save_indicator_frame(fingerprint: str, params_key: str, indicators: pd.DataFrame) -> None:
+    cache_dir = settings.indicator_cache_dir
+    file_name = _indicator_file_name(fingerprint, params_key)
+    table = pa.Table.from_pandas(indicators.reset_index(drop=True), preserve_index=False)
+    with FileLock(cache_dir / LOCK_FILE_NAME):
+        atomic_write(cache_dir / file_name, lambda temp_path: pq.write_table(table, temp_path))
+
+        expired = cache_index.add_indicator_frame(
+            file_name,
+            byte_size=(cache_dir / file_name).stat().st_size,
+            accessed_at=int(time.time() * 1000),
+            max_bytes=settings.indicator_disk_budget_mb * 1024 * 1024,
+        )
+        for expired_name in expired:
+            (cache_dir / expired_name).unlink(missing_ok=True)
+
+
+def list_cache_files() -> dict[str, list[dict]]:
+    cache_files_by_symbol: dict[str, list[dict]] = {}
+    for row in cache_index.list_partitions():
+        cache_files_by_symbol.setdefault(row["symbol"], []).append(
             {
-                "filename": file_path.name,
-                "timeframe": timeframe,
-                "size": f"{file_path.stat().st_size / (1024 * 1024):.2f} MB",
-                "modified": datetime.fromtimestamp(file_path.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+                "filename": row["path"],
+                "exchange": row["exchange"],
+                "timeframe": row["timeframe"],
+                "month": row["month"],
+                "seq": row["seq"],
+                "rows": row["row_count"],
+                "range": [row["min_ts"], row["max_ts"]],
+                "size": f"{row['byte_size'] / (1024 * 1024):.2f} MB",
+                "checksum": row["checksum"],
+                "modified": datetime.fromtimestamp(row["updated_at"] / 1000).strftime("%Y-%m-%d %H:%M:%S"),
             }
         )
 
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+
+SCHEMA_VERSION = 2
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS partitions (
+    exchange TEXT NOT NULL,
+    symbol_key TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    month TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    path TEXT NOT NULL,
+    min_ts INTEGER NOT NULL,
+    max_ts INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    byte_size INTEGER NOT NULL,
+    checksum TEXT NOT NULL,
+    updated_at INTEGER NOT NULL,
+    PRIMARY KEY (exchange, symbol_key, timeframe, month, seq)
+);
+CREATE TABLE IF NOT EXISTS coverage (
+    exchange TEXT NOT NULL,
+    symbol_key TEXT NOT NULL,
+    timeframe TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL,
+    final INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS coverage_market ON coverage (exchange, symbol_key, timeframe, start_ts);
+CREATE TABLE IF NOT EXISTS indicator_frames (
+    file_name TEXT PRIMARY KEY,
+    byte_size INTEGER NOT NULL,
+    accessed_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS indicator_frames_accessed ON indicator_frames (accessed_at);
+"""
+
+
+class CacheIndex:
+    """缓存目录的 SQLite 索引，记录分区元数据与覆盖区间，查询不再需要 glob/stat 扫描。
+
+    每个月份由若干按 ``seq`` 递增的不可变文件组成，同一时间戳以 ``seq`` 较大的文件为准。
+    使用 WAL 模式，多个 worker 进程可同时读，写入按事务串行化；每个线程持有自己的连接。
+    ``data_dirs`` 是内容全部由索引登记的目录（分区文件、指标缓存），结构重建时随索引一起清空。
+    """
+
+    def __init__(self, db_path: Path, data_dirs: tuple[Path, ...] = ()) -> None:
+        self.db_path = db_path
+        self.data_dirs = data_dirs
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with self._schema_lock:
+                if not self._schema_ready:
+                    self._ensure_schema(connection)
+                    self._schema_ready = True
+            self._local.connection = connection
+        return connection
+
+    def _ensure_schema(self, connection: sqlite3.Connection) -> None:
+        """索引只是缓存的元数据，结构版本变化时直接重建，对应的K线会按缺口重新拉取。
+
+        旧表登记的文件不再有人认领，在同一个写事务里把 ``data_dirs`` 一并清空，其他进程不会在此期间写入。
+        """
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                for table in ("partitions", "coverage", "indicator_frames"):
+                    connection.execute(f"DROP TABLE IF EXISTS {table}")
+                for data_dir in self.data_dirs:
+                    shutil.rmtree(data_dir, ignore_errors=True)
+                connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+        connection.executescript(SCHEMA)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get_partitions(
+        self,
+        exchange: str,
+        symbol_key: str,
+        timeframe: str,
+        months: list[str] | None = None,
+    ) -> list[sqlite3.Row]:
+        query = "SELECT * FROM partitions WHERE exchange = ? AND symbol_key = ? AND timeframe = ?"
+        params: list = [exchange, symbol_key, timeframe]
+        if months is not None:
+            query += f" AND month IN ({','.join('?' * len(months))})"
+            params.extend(months)
+        return self._connection().execute(f"{query} ORDER BY month, seq", params).fetchall()
+
+    def next_seq(self, connection: sqlite3.Connection, exchange: str, symbol_key: str, timeframe: str, month: str) -> int:
+        """在写事务内分配该月下一个段号；写锁跨进程串行，段号唯一且严格递增，不依赖各进程的时钟。"""
+        return connection.execute(
+            "SELECT COALESCE(MAX(seq), 0) + 1 FROM partitions "
+            "WHERE exchange = ? AND symbol_key = ? AND timeframe = ? AND month = ?",
+            (exchange, symbol_key, timeframe, month),
+        ).fetchone()[0]
+
+    def insert_partition(self, connection: sqlite3.Connection, **row) -> None:
+        columns = ", ".join(row)
+        placeholders = ", ".join("?" * len(row))
+        connection.execute(f"INSERT INTO partitions ({columns}) VALUES ({placeholders})", list(row.values()))
+
+    def delete_partitions(self, connection: sqlite3.Connection, rows: list[sqlite3.Row]) -> None:
+        connection.executemany(
+            "DELETE FROM partitions WHERE exchange = ? AND symbol_key = ? AND timeframe = ? AND month = ? AND seq = ?",
+            [(row["exchange"], row["symbol_key"], row["timeframe"], row["month"], row["seq"]) for row in rows],
+        )
+
+    def count_partition_files(self, exchange: str, symbol_key: str, timeframe: str, month: str) -> int:
+        return self._connection().execute(
+            "SELECT COUNT(*) FROM partitions WHERE exchange = ? AND symbol_key = ? AND timeframe = ? AND month = ?",
+            (exchange, symbol_key, timeframe, month),
+        ).fetchone()[0]
+
+    def list_partitions(self) -> list[sqlite3.Row]:
+        return self._connection().execute(
+            "SELECT * FROM partitions ORDER BY symbol, exchange, timeframe, month, seq"
+        ).fetchall()
+
+    def get_coverage(self, exchange: str, symbol_key: str, timeframe: str) -> list[sqlite3.Row]:
+        return self._connection().execute(
+            "SELECT * FROM coverage WHERE exchange = ? AND symbol_key = ? AND timeframe = ? ORDER BY start_ts",
+            (exchange, symbol_key, timeframe),
+        ).fetchall()
+
+    def replace_coverage(
+        self,
+        exchange: str,
+        symbol_key: str,
+        timeframe: str,
+        start: int,
+        end: int,
+        new_intervals: list[dict],
+    ) -> None:
+        """在一个事务里把与 ``[start, end]`` 重叠的旧区间裁掉，再写入新区间。"""
+        market = (exchange, symbol_key, timeframe)
+        with self.transaction() as connection:
+            overlapping = connection.execute(
+                "SELECT rowid, * FROM coverage WHERE exchange = ? AND symbol_key = ? AND timeframe = ? "
+                "AND end_ts >= ? AND start_ts <= ?",
+                (*market, start, end),
+            ).fetchall()
+            remainders = []
+            for row in overlapping:
+                if row["start_ts"] < start:
+                    remainders.append((row["start_ts"], start - 1, row["fetched_at"], row["final"]))
+                if row["end_ts"] > end:
+                    remainders.append((end + 1, row["end_ts"], row["fetched_at"], row["final"]))
+            connection.executemany("DELETE FROM coverage WHERE rowid = ?", [(row["rowid"],) for row in overlapping])
+
+            remainders.extend(
+                (item["start"], item["end"], item["fetched_at"], int(item["final"])) for item in new_intervals
+            )
+            connection.executemany(
+                "INSERT INTO coverage (exchange, symbol_key, timeframe, start_ts, end_ts, fetched_at, final) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(*market, *item) for item in remainders],
+            )
+
+    def touch_indicator_frame(self, file_name: str, accessed_at: int) -> bool:
+        cursor = self._connection().execute(
+            "UPDATE indicator_frames SET accessed_at = ? WHERE file_name = ?",
+            (accessed_at, file_name),
+        )
+        return cursor.rowcount > 0
+
+    def add_indicator_frame(self, file_name: str, byte_size: int, accessed_at: int, max_bytes: int) -> list[str]:
+        """登记新的指标缓存文件，并返回按最近使用累计超出字节预算、应删除的文件名。"""
+        with self.transaction() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO indicator_frames (file_name, byte_size, accessed_at) VALUES (?, ?, ?)",
+                (file_name, byte_size, accessed_at),
+            )
+            expired = [
+                row["file_name"]
+                for row in connection.execute(
+                    "SELECT file_name FROM (SELECT file_name, SUM(byte_size) OVER "
+                    "(ORDER BY accessed_at DESC, file_name ROWS UNBOUNDED PRECEDING) AS total FROM indicator_frames) "
+                    "WHERE total > ?",
+                    (max_bytes,),
+                ).fetchall()
+            ]
+            connection.executemany("DELETE FROM indicator_frames WHERE file_name = ?", [(name,) for name in expired])
+        return expired
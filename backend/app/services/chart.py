@@ -1,35 +1,74 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from datetime import datetime
 
+import ccxt
 import pandas as pd
 
 from backend.app.core.config import settings
+from backend.app.core.constants import TIMEFRAME_INCREMENT_MS
 from backend.app.schemas.chart import IndicatorSettings
-from backend.app.services.cache import append_to_cache, get_cache_key, get_cached_data, save_to_cache
-from backend.app.services.exchange import create_exchange
+from backend.app.services.cache import (
+    OHLCV_COLUMNS,
+    empty_ohlcv_frame,
+    fingerprint_ohlcv,
+    get_cached_ohlcv,
+    get_missing_ranges,
+    load_indicator_frame,
+    quick_fingerprint_ohlcv,
+    read_ohlcv,
+    record_coverage,
+    save_indicator_frame,
+    save_ohlcv,
+)
+from backend.app.services.exchange import get_async_exchange
+from backend.app.services.indicators import INDICATORS, IndicatorEngine, IndicatorState
+from backend.app.services.markets import load_markets_async
+from backend.app.services.memory_cache import ByteBudgetLRU
+from backend.app.services.ohlcv_fetch import fetch_ohlcv_range
+from backend.app.services.route_health import NON_ROUTE_ERRORS, route_health
+from backend.app.services.singleflight import SingleFlight
+
+
+INDICATOR_STATE_CACHE_BYTES = 8 * 1024 * 1024
+# 预热最多往前取这么多根K线；参数上限（周期 500）下 MACD/RSI 约需 4000 根，留一点余量。
+MAX_WARMUP_CANDLES = 5000
 
 
 logger = logging.getLogger(__name__)
+ohlcv_flight = SingleFlight()
+# 指标递推状态，键为 (交易所, 交易对, 周期, 指标参数, 首根时间, 末根时间)；单个状态只有几百字节。
+indicator_states = ByteBudgetLRU(INDICATOR_STATE_CACHE_BYTES)
+# 已算好的指标列，键为 (K线指纹, 指标名, 该指标的参数)，值为 (输出列, 只含该指标的递推状态)；切换参数组合时未变的指标直接复用。
+indicator_memo = ByteBudgetLRU(settings.indicator_memory_budget_mb * 1024 * 1024)
 
 
-def _with_public_exchange_fallback(exchange_name: str, symbol: str, action):
-    attempts = [True, False] if settings.exchange_proxy_url else [True]
+async def _with_public_exchange_fallback(exchange_name: str, symbol: str, action):
+    """按路由健康状况选择代理或直连执行协程 ``action``，只有连接类错误才切换到另一条路由。
+
+    限频（429 / DDoSProtection）直接抛出，不记为路由失败，也不换路由重试。
+    """
     last_exc: Exception | None = None
 
-    for use_proxy in attempts:
-        exchange = create_exchange(exchange_name, require_auth=False, use_proxy=use_proxy)
+    for use_proxy in route_health.route_order(exchange_name):
+        exchange = get_async_exchange(exchange_name, use_proxy=use_proxy)
+        started = time.perf_counter()
         try:
+            await load_markets_async(exchange)
             normalized_symbol = normalize_symbol(exchange, symbol)
-            return action(exchange, normalized_symbol)
-        except Exception as exc:
-            last_exc = exc
-            if use_proxy:
-                logger.warning("通过代理访问交易所失败，回退直连: %s", exc)
-                continue
+            result = await action(exchange, normalized_symbol)
+        except NON_ROUTE_ERRORS:
             raise
+        except ccxt.NetworkError as exc:
+            route_health.record_failure(exchange_name, use_proxy, exc)
+            last_exc = exc
+            logger.warning("通过%s访问交易所失败，尝试另一条路由: %s", "代理" if use_proxy else "直连", exc)
+            continue
+        route_health.record_success(exchange_name, use_proxy, (time.perf_counter() - started) * 1000)
+        return result
 
     if last_exc is not None:
         raise last_exc
@@ -37,64 +76,148 @@ def _with_public_exchange_fallback(exchange_name: str, symbol: str, action):
 
 
 def add_technical_indicators(df: pd.DataFrame, indicator_settings: IndicatorSettings | None = None) -> pd.DataFrame:
-    indicator_settings = indicator_settings or IndicatorSettings()
-    df = df.copy()
-    ema_periods = sorted({int(period) for period in indicator_settings.ema.periods if int(period) > 0})
-    rsi_period = indicator_settings.rsi.period
-    macd_fast = indicator_settings.macd.fast_period
-    macd_slow = indicator_settings.macd.slow_period
-    macd_signal = indicator_settings.macd.signal_period
+    return _with_indicators(df, indicator_settings)[0]
+
+
+def _with_indicators(
+    df: pd.DataFrame, indicator_settings: IndicatorSettings | None = None, state: IndicatorState | None = None
+) -> tuple[pd.DataFrame, IndicatorState]:
+    indicators, state = IndicatorEngine(indicator_settings).run(df, state)
+    return pd.concat([df, indicators], axis=1), state
+
+
+def warmup_since(since: int, timeframe: str, indicator_settings: IndicatorSettings | None = None) -> int:
+    """为让图表首根K线上的指标与长历史一致，需要从多早开始取K线。"""
+    warmup = min(IndicatorEngine(indicator_settings).warmup, MAX_WARMUP_CANDLES)
+    return since - warmup * TIMEFRAME_INCREMENT_MS.get(timeframe, 0)
+
+
+def _timestamp_ms(value) -> int:
+    return int(pd.Timestamp(value).value // 1_000_000)
 
-    for period in ema_periods:
-        df[f"ema_{period}"] = df["close"].ewm(span=period, adjust=False).mean()
 
-    delta = df["close"].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    avg_gain = gain.rolling(window=rsi_period).mean()
-    avg_loss = loss.rolling(window=rsi_period).mean()
+def _remember_state(
+    series_key: tuple[str, str, str], params_key: str, first_ms: int, last_ms: int, state: IndicatorState
+) -> None:
+    exchange_name, symbol, timeframe = series_key
+    key = (exchange_name.lower(), symbol, timeframe, params_key, first_ms, last_ms)
+    indicator_states.put(key, state, state.approx_bytes)
 
-    for i in range(rsi_period, len(df)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * (rsi_period - 1) + gain.iloc[i]) / rsi_period
-        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * (rsi_period - 1) + loss.iloc[i]) / rsi_period
 
-    rs = avg_gain / avg_loss
-    df["rsi"] = 100 - (100 / (1 + rs))
+def _recall_state(series_key: tuple[str, str, str], params_key: str, first_ms: int, last_ms: int) -> IndicatorState | None:
+    exchange_name, symbol, timeframe = series_key
+    return indicator_states.get((exchange_name.lower(), symbol, timeframe, params_key, first_ms, last_ms))
 
-    df["ema12"] = df["close"].ewm(span=macd_fast, adjust=False).mean()
-    df["ema26"] = df["close"].ewm(span=macd_slow, adjust=False).mean()
-    df["macd"] = df["ema12"] - df["ema26"]
-    df["signal"] = df["macd"].ewm(span=macd_signal, adjust=False).mean()
-    df["histogram"] = df["macd"] - df["signal"]
 
-    return df.fillna(0)
+def _memo_key(data_key, indicator_name: str, indicator_settings: IndicatorSettings) -> tuple:
+    return (data_key, indicator_name, INDICATORS[indicator_name].params(indicator_settings).model_dump_json())
 
 
-def prepare_chart_payload(df: pd.DataFrame) -> dict:
+def _memo_put(key: tuple, columns: dict, state: IndicatorState | None) -> None:
+    size = sum(array.nbytes for array in columns.values()) + (state.approx_bytes if state is not None else 0)
+    indicator_memo.put(key, (columns, state), size)
+
+
+def _closed_series(df: pd.DataFrame, series_key: tuple[str, str, str] | None) -> bool:
+    """末根K线已收盘时整段都不会再变，指标结果才值得落盘；不知道周期时无法判断，按未收盘处理。"""
+    increment = TIMEFRAME_INCREMENT_MS.get(series_key[2], 0) if series_key is not None else 0
+    return bool(increment) and _timestamp_ms(df["timestamp"].iloc[-1]) + increment <= time.time() * 1000
+
+
+def apply_cached_indicators(
+    df: pd.DataFrame,
+    indicator_settings: IndicatorSettings | None = None,
+    series_key: tuple[str, str, str] | None = None,
+    since: int | None = None,
+) -> pd.DataFrame:
+    """指标结果先查进程内备忘，再查按 (K线指纹, 指标参数) 存放的磁盘缓存，都没有时只重算缺少的指标。
+
+    进程内备忘按指标分别保存，给出 ``series_key``（交易所、交易对、周期）时用轻量指纹作键，
+    同一图表来回切换仓位或参数组合不必再对整段K线做摘要。
+    只有末根已收盘的序列才读写磁盘缓存：未收盘K线每次跳动都会换指纹，落盘只会堆积用不上的文件。
+    ``df`` 可以带有 ``since`` 之前的预热K线：指标在整段上计算，返回前裁掉预热部分。
+    给出 ``series_key`` 时，算出的递推状态按裁剪后的首尾时间记下来，供加载更多续算。
+    """
+    indicator_settings = indicator_settings or IndicatorSettings()
+    df = df.reset_index(drop=True)
+    if df.empty:
+        return add_technical_indicators(df, indicator_settings)
+    params_key = indicator_settings.model_dump_json()
+    engine = IndicatorEngine(indicator_settings)
+
+    if series_key is not None:
+        exchange_name, symbol, timeframe = series_key
+        data_key = (exchange_name.lower(), symbol, timeframe, quick_fingerprint_ohlcv(df))
+    else:
+        data_key = fingerprint_ohlcv(df)
+    memo_keys = {indicator.name: _memo_key(data_key, indicator.name, indicator_settings) for indicator in engine.indicators}
+    entries = {name: indicator_memo.get(key) for name, key in memo_keys.items()}
+    missing = [name for name, entry in entries.items() if entry is None]
+
+    persist = _closed_series(df, series_key)
+    recomputed = False
+    if missing:
+        fingerprint = fingerprint_ohlcv(df) if persist else None
+        stored = load_indicator_frame(fingerprint, params_key) if persist else None
+        if stored is not None and len(stored) == len(df):
+            # 磁盘缓存没有递推状态，从这里取出的指标不能直接续算，加载更多时会回放本地K线。
+            for name in missing:
+                columns = {column: stored[column].to_numpy(copy=True) for column in INDICATORS[name].columns(indicator_settings)}
+                entries[name] = (columns, None)
+                _memo_put(memo_keys[name], columns, None)
+        else:
+            partial_settings = indicator_settings.model_copy(update={"enabled": missing})
+            computed, partial_state = IndicatorEngine(partial_settings).run(df)
+            for name in missing:
+                columns = {column: computed[column].to_numpy(copy=True) for column in INDICATORS[name].columns(indicator_settings)}
+                state = IndicatorState(len(df), {name: partial_state.states[name]})
+                entries[name] = (columns, state)
+                _memo_put(memo_keys[name], columns, state)
+            recomputed = True
+
+    columns = {column: array for name in memo_keys for column, array in entries[name][0].items()}
+    indicators = pd.DataFrame(columns, index=df.index)
+    if recomputed and persist:
+        save_indicator_frame(fingerprint, params_key, indicators)
+
+    frame = pd.concat([df, indicators], axis=1)
+    if since is not None:
+        frame = frame[frame["timestamp"] >= pd.to_datetime(since, unit="ms")].reset_index(drop=True)
+    resumable = all(entries[name][1] is not None for name in memo_keys)
+    if series_key is not None and not frame.empty and resumable:
+        states = {name: entries[name][1].states[name] for name in memo_keys}
+        first_ms, last_ms = _timestamp_ms(frame["timestamp"].iloc[0]), _timestamp_ms(frame["timestamp"].iloc[-1])
+        _remember_state(series_key, params_key, first_ms, last_ms, IndicatorState(len(df), states))
+    return frame
+
+
+def _series_records(frame: pd.DataFrame, column: str) -> list[dict]:
+    """预热不足的位置是 NaN，直接省略这些点，前端显示为空白而不是 0。"""
+    return frame[["time", column]].dropna().rename(columns={column: "value"}).to_dict("records")
+
+
+def prepare_chart_payload(df: pd.DataFrame, indicator_settings: IndicatorSettings | None = None) -> dict:
+    """K线与成交量总会返回；指标只序列化请求里启用的那些。"""
+    indicator_settings = indicator_settings or IndicatorSettings()
     frame = df.copy()
     frame["time"] = frame["timestamp"].map(lambda ts: int(pd.Timestamp(ts).timestamp()))
-    ema_series = [
-        {
-            "period": int(column.replace("ema_", "")),
-            "data": frame[["time", column]].rename(columns={column: "value"}).to_dict("records"),
-        }
-        for column in frame.columns
-        if column.startswith("ema_")
-    ]
-    ema_series.sort(key=lambda item: item["period"])
-    return {
+    payload = {
         "candlestick": frame[["time", "open", "high", "low", "close"]].to_dict("records"),
         "volume": frame[["time", "volume"]].to_dict("records"),
-        "ema_series": ema_series,
-        "rsi": frame[["time", "rsi"]].rename(columns={"rsi": "value"}).to_dict("records"),
-        "macd": frame[["time", "macd"]].rename(columns={"macd": "value"}).to_dict("records"),
-        "signal": frame[["time", "signal"]].rename(columns={"signal": "value"}).to_dict("records"),
-        "histogram": frame[["time", "histogram"]].rename(columns={"histogram": "value"}).to_dict("records"),
     }
+    for indicator in IndicatorEngine(indicator_settings).indicators:
+        columns = [column for column in indicator.columns(indicator_settings) if column in frame.columns]
+        if indicator.periodic:
+            payload[f"{indicator.name}_series"] = [
+                {"period": int(column.rsplit("_", 1)[1]), "data": _series_records(frame, column)} for column in columns
+            ]
+        else:
+            payload.update((column, _series_records(frame, column)) for column in columns)
+    return payload
 
 
 def normalize_symbol(exchange, symbol: str) -> str:
-    exchange.load_markets()
+    """在已装载市场数据的客户端上解析交易对。"""
     if symbol in exchange.markets:
         return symbol
     if ":" not in symbol and symbol.endswith("USDT"):
@@ -106,7 +229,22 @@ def normalize_symbol(exchange, symbol: str) -> str:
     return symbol
 
 
-def fetch_ohlcv_data(
+def _rows_to_frame(rows: list[list]) -> pd.DataFrame:
+    if not rows:
+        return empty_ohlcv_frame()
+    df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df
+
+
+def _store_rows(exchange_name: str, symbol: str, timeframe: str, rows: list[list], start: int, end: int) -> pd.DataFrame:
+    df = _rows_to_frame(rows)
+    save_ohlcv(exchange_name, symbol, timeframe, df)
+    record_coverage(exchange_name, symbol, timeframe, start, end)
+    return df
+
+
+async def fetch_ohlcv_data(
     exchange_name: str,
     symbol: str,
     timeframe: str,
@@ -114,95 +252,118 @@ def fetch_ohlcv_data(
     until: int | None,
     indicator_settings: IndicatorSettings | None = None,
 ) -> pd.DataFrame:
-    indicator_settings = indicator_settings or IndicatorSettings()
-    indicator_signature = (
-        f"ema{'-'.join(map(str, indicator_settings.ema.periods))}_"
-        f"rsi{indicator_settings.rsi.period}_"
-        f"macd{indicator_settings.macd.fast_period}_{indicator_settings.macd.slow_period}_{indicator_settings.macd.signal_period}"
-    )
-
-    direct_cache_key = get_cache_key(symbol, timeframe, since, until, indicator_signature=indicator_signature)
-    direct_cached = get_cached_data(direct_cache_key)
-    if direct_cached is not None and not direct_cached.empty:
-        return direct_cached
-
-    def _load(exchange, normalized_symbol: str) -> pd.DataFrame:
-        cache_key = get_cache_key(normalized_symbol, timeframe, since, until, indicator_signature=indicator_signature)
-        cached = get_cached_data(cache_key)
-        if cached is not None and not cached.empty:
-            return cached
-
-        all_ohlcv = []
-        batch_limit = 1000
-        if since and until:
-            try:
-                all_ohlcv = exchange.fetch_ohlcv(
-                    symbol=normalized_symbol,
-                    timeframe=timeframe,
-                    limit=batch_limit,
-                    params={"startTime": since, "endTime": until},
-                )
-            except Exception:
-                current_since = since
-                while current_since < until:
-                    batch = exchange.fetch_ohlcv(
-                        symbol=normalized_symbol,
-                        timeframe=timeframe,
-                        limit=batch_limit,
-                        params={"since": current_since},
-                    )
-                    if not batch:
-                        break
-                    batch = [candle for candle in batch if candle[0] <= until]
-                    all_ohlcv.extend(batch)
-                    if len(batch) < batch_limit:
-                        break
-                    current_since = batch[-1][0] + 1
-                    time.sleep(0.5)
-        else:
-            all_ohlcv = exchange.fetch_ohlcv(symbol=normalized_symbol, timeframe=timeframe, limit=batch_limit)
-
-        if not all_ohlcv:
-            return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
-
-        df = pd.DataFrame(all_ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        df = add_technical_indicators(df, indicator_settings=indicator_settings)
-        save_to_cache(cache_key, df)
+    """交易所请求走异步客户端，本地存储读写与指标计算放到线程里，事件循环只负责等待。
+
+    K线从 ``since`` 往前多取各指标所需的预热长度（同样优先走缓存），指标在整段上计算后再裁回 ``since``。
+    """
+    series_key = (exchange_name, symbol, timeframe)
+    fetch_since = warmup_since(since, timeframe, indicator_settings) if since is not None else None
+    cached = await asyncio.to_thread(get_cached_ohlcv, exchange_name, symbol, timeframe, fetch_since, until)
+    if cached is not None:
+        return await asyncio.to_thread(apply_cached_indicators, cached, indicator_settings, series_key, since)
+
+    async def _load(exchange, normalized_symbol: str) -> pd.DataFrame:
+        if since is None or until is None:
+            df = _rows_to_frame(await fetch_ohlcv_range(exchange, normalized_symbol, timeframe, fetch_since, until))
+            await asyncio.to_thread(save_ohlcv, exchange_name, normalized_symbol, timeframe, df)
+            return df
+
+        gaps = await asyncio.to_thread(
+            get_missing_ranges, exchange_name, normalized_symbol, timeframe, fetch_since, until
+        )
+        for gap_start, gap_end in gaps:
+            rows = await fetch_ohlcv_range(exchange, normalized_symbol, timeframe, gap_start, gap_end)
+            await asyncio.to_thread(_store_rows, exchange_name, normalized_symbol, timeframe, rows, gap_start, gap_end)
+        return await asyncio.to_thread(read_ohlcv, exchange_name, normalized_symbol, timeframe, fetch_since, until)
+
+    # 指标参数只通过预热长度进入 key：相同K线请求只访问一次交易所，指标由各请求各自计算。
+    flight_key = ("ohlcv", exchange_name.lower(), symbol, timeframe, fetch_since, until)
+    df = await ohlcv_flight.do(flight_key, lambda: _with_public_exchange_fallback(exchange_name, symbol, _load))
+    if df.empty:
         return df
-
-    return _with_public_exchange_fallback(exchange_name, symbol, _load)
+    return await asyncio.to_thread(apply_cached_indicators, df, indicator_settings, series_key, since)
+
+
+def _to_ms(timestamp: int) -> int:
+    """前端传来的是秒级时间，兼容毫秒。"""
+    return timestamp * 1000 if timestamp < 10_000_000_000 else timestamp
+
+
+def _resume_state(
+    series_key: tuple[str, str, str],
+    store_symbol: str,
+    indicator_settings: IndicatorSettings,
+    first_ms: int | None,
+    last_ms: int,
+) -> IndicatorState | None:
+    """取出图表末根K线处的指标状态；不在内存里时从本地K线回放，回放不到时返回 ``None``（从头算）。
+
+    回放与加载图表时一样从首根往前多取预热长度；不知道首根时只回放末根之前的预热长度。
+    """
+    if first_ms is not None:
+        state = _recall_state(series_key, indicator_settings.model_dump_json(), first_ms, last_ms)
+        if state is not None:
+            return state
+
+    exchange_name, _, timeframe = series_key
+    replay_since = warmup_since(last_ms if first_ms is None else first_ms, timeframe, indicator_settings)
+    history = read_ohlcv(exchange_name, store_symbol, timeframe, replay_since, last_ms)
+    if history.empty or _timestamp_ms(history["timestamp"].iloc[-1]) != last_ms:
+        logger.warning("%s %s %s 本地缺少图表末根K线之前的数据，指标从新数据开始重新计算", exchange_name, store_symbol, timeframe)
+        return None
+    _, state = IndicatorEngine(indicator_settings).run(history.reset_index(drop=True))
+    return state
+
+
+def _load_more_payload(
+    df: pd.DataFrame,
+    series_key: tuple[str, str, str],
+    indicator_settings: IndicatorSettings,
+    state: IndicatorState | None,
+    first_ms: int | None,
+) -> dict:
+    df, state = _with_indicators(df.reset_index(drop=True), indicator_settings, state)
+    if first_ms is not None:
+        last_ms = _timestamp_ms(df["timestamp"].iloc[-1])
+        _remember_state(series_key, indicator_settings.model_dump_json(), first_ms, last_ms, state)
+    return {"chart": prepare_chart_payload(df, indicator_settings), "added": len(df)}
 
 
-def load_more_ohlcv(
+async def load_more_ohlcv(
     exchange_name: str,
     symbol: str,
     timeframe: str,
     last_timestamp: int,
     candles_to_load: int,
     timeframe_increment_ms: int,
+    indicator_settings: IndicatorSettings | None = None,
+    first_timestamp: int | None = None,
 ) -> dict:
-    since = last_timestamp * 1000 + 1 if last_timestamp < 10_000_000_000 else last_timestamp + 1
+    """在图表末尾追加新K线，指标从图表末根K线处的递推状态接着算，与整段重算的结果一致。"""
+    indicator_settings = indicator_settings or IndicatorSettings()
+    series_key = (exchange_name, symbol, timeframe)
+    last_ms = _to_ms(last_timestamp)
+    first_ms = _to_ms(first_timestamp) if first_timestamp is not None else None
+    since = last_ms + 1
     until = min(since + timeframe_increment_ms * candles_to_load, int(datetime.now().timestamp() * 1000))
 
-    def _load(exchange, normalized_symbol: str) -> dict:
-        ohlcv = exchange.fetch_ohlcv(
-            symbol=normalized_symbol,
-            timeframe=timeframe,
-            limit=1000,
-            params={"startTime": since, "endTime": until},
-        )
+    async def _load(exchange, normalized_symbol: str) -> dict:
+        ohlcv = await fetch_ohlcv_range(exchange, normalized_symbol, timeframe, since, until)
         if not ohlcv:
             return {"chart": None, "added": 0}
 
-        df = pd.DataFrame(ohlcv, columns=["timestamp", "open", "high", "low", "close", "volume"])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        df = add_technical_indicators(df)
-        append_to_cache(normalized_symbol, timeframe, df)
-        payload = prepare_chart_payload(df)
-        added = max(len(payload["candlestick"]) - 1, 0)
-        for key in payload:
-            payload[key] = payload[key][1:]
-        return {"chart": payload, "added": added}
-
-    return _with_public_exchange_fallback(exchange_name, symbol, _load)
+        df = await asyncio.to_thread(_store_rows, exchange_name, normalized_symbol, timeframe, ohlcv, since, until)
+        state = await asyncio.to_thread(_resume_state, series_key, normalized_symbol, indicator_settings, first_ms, last_ms)
+        return await asyncio.to_thread(_load_more_payload, df, series_key, indicator_settings, state, first_ms)
+
+    flight_key = (
+        "load_more",
+        exchange_name.lower(),
+        symbol,
+        timeframe,
+        since,
+        until,
+        first_ms,
+        indicator_settings.model_dump_json(),
+    )
+    return await ohlcv_flight.do(flight_key, lambda: _with_public_exchange_fallback(exchange_name, symbol, _load))
@@ -1,16 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 import time
 
 import ccxt
+import ccxt.async_support as ccxt_async
 import urllib3
 
 from backend.app.core.config import settings
+from backend.app.services.rate_limit import install_rate_limiter
+from backend.app.services.replay_exchange import ReplayData, create_replay_exchange
 
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logger = logging.getLogger(__name__)
+_client_pool: dict[tuple[str, bool, bool], ccxt.Exchange] = {}
+_pool_lock = threading.Lock()
+_time_sync_thread: threading.Thread | None = None
+_async_client_pool: dict[tuple[str, bool], ccxt_async.Exchange] = {}
+_exchange_semaphores: dict[str, asyncio.Semaphore] = {}
+_replay_data: ReplayData | None = None
 
 
 def _common_config(*, use_proxy: bool = True) -> dict:
@@ -28,8 +39,7 @@ def _common_config(*, use_proxy: bool = True) -> dict:
     return config
 
 
-def create_exchange(exchange_name: str = "binance", require_auth: bool = False, *, use_proxy: bool = True):
-    exchange_name = exchange_name.lower()
+def _exchange_config(exchange_name: str, require_auth: bool, *, use_proxy: bool) -> dict:
     config = _common_config(use_proxy=use_proxy)
 
     if exchange_name == "binance":
@@ -46,7 +56,6 @@ def create_exchange(exchange_name: str = "binance", require_auth: bool = False,
                 raise ValueError("缺少币安API密钥")
             config["apiKey"] = settings.binance_api_key
             config["secret"] = settings.binance_api_secret
-        exchange = ccxt.binance(config)
     elif exchange_name == "okx":
         config["options"] = {
             "defaultType": settings.okx_default_type,
@@ -58,17 +67,160 @@ def create_exchange(exchange_name: str = "binance", require_auth: bool = False,
             config["apiKey"] = settings.okx_api_key
             config["secret"] = settings.okx_api_secret
             config["password"] = settings.okx_api_passphrase
-        exchange = ccxt.okx(config)
     else:
         raise ValueError(f"不支持的交易所: {exchange_name}")
 
+    return config
+
+
+def _replay_exchange(exchange_name: str, *, asynchronous: bool = False):
+    global _replay_data
+    if exchange_name not in {"binance", "okx"}:
+        raise ValueError(f"不支持的交易所: {exchange_name}")
+    if _replay_data is None:
+        _replay_data = ReplayData(settings.exchange_replay_dir)
+    default_type = settings.binance_default_type if exchange_name == "binance" else settings.okx_default_type
+    return create_replay_exchange(
+        exchange_name,
+        default_type,
+        asynchronous=asynchronous,
+        data=_replay_data,
+        latency_ms=settings.exchange_replay_latency_ms,
+        rate_limit_every=settings.exchange_replay_rate_limit_every,
+    )
+
+
+def _uses_replay_server(exchange_name: str) -> bool:
+    return bool(settings.exchange_replay_url) and exchange_name == "binance"
+
+
+def _point_at_replay_server(exchange) -> None:
+    """把币安合约接口的地址指向本地回放服务（scripts/replay_exchange_server.py），其余逻辑仍走真实 ccxt。
+
+    回放服务在本机，不走出站代理；它不校验签名，缺少密钥时用占位值；市场列表只加载 U 本位合约，也不请求 sapi 的币种信息。
+    """
+    base_url = settings.exchange_replay_url.rstrip("/")
+    for key, url in exchange.urls["api"].items():
+        if isinstance(url, str) and url.startswith("https://fapi.binance.com"):
+            exchange.urls["api"][key] = url.replace("https://fapi.binance.com", base_url)
+    exchange.options["fetchMarkets"] = {"types": ["linear"]}
+    exchange.has["fetchCurrencies"] = False
+    exchange.apiKey = exchange.apiKey or "replay"
+    exchange.secret = exchange.secret or "replay"
+
+
+def create_exchange(exchange_name: str = "binance", require_auth: bool = False, *, use_proxy: bool = True):
+    """构造一个新的 ccxt 客户端，不做任何网络请求；请求路径上请使用 :func:`get_exchange` 复用连接。
+
+    ``EXCHANGE_REPLAY=true`` 时返回离线回放替身，便于无网络地基准测试与联调。
+    """
+    exchange_name = exchange_name.lower()
+    if settings.exchange_replay:
+        return _replay_exchange(exchange_name)
+    replay_server = _uses_replay_server(exchange_name)
+    config = _exchange_config(
+        exchange_name, require_auth and not replay_server, use_proxy=use_proxy and not replay_server
+    )
+    exchange = getattr(ccxt, exchange_name)(config)
+    if replay_server:
+        _point_at_replay_server(exchange)
+    if settings.ccxt_enable_rate_limit:
+        install_rate_limiter(exchange)
+    return exchange
+
+
+def async_proxy_config(proxy_url: str) -> dict:
+    """异步客户端的代理参数：aiohttp 只会对代理发 HTTP CONNECT，``socks*`` 地址要交给 ccxt 的 ``socksProxy``（aiohttp_socks）。"""
+    if proxy_url.lower().startswith("socks"):
+        return {"socksProxy": proxy_url}
+    return {"aiohttp_proxy": proxy_url}
+
+
+def create_async_exchange(exchange_name: str = "binance", *, use_proxy: bool = True):
+    """构造 ``ccxt.async_support`` 公共客户端，代理按地址协议换成异步写法，限频与同步客户端共用同一份额度。"""
+    exchange_name = exchange_name.lower()
+    if settings.exchange_replay:
+        return _replay_exchange(exchange_name, asynchronous=True)
+    replay_server = _uses_replay_server(exchange_name)
+    config = _exchange_config(exchange_name, False, use_proxy=use_proxy and not replay_server)
+    if config.pop("proxies", None):
+        config.update(async_proxy_config(settings.exchange_proxy_url))
+    exchange = getattr(ccxt_async, exchange_name)(config)
+    if replay_server:
+        _point_at_replay_server(exchange)
+    if settings.ccxt_enable_rate_limit:
+        install_rate_limiter(exchange)
+    return exchange
+
+
+def get_exchange(exchange_name: str = "binance", require_auth: bool = False, *, use_proxy: bool = True):
+    """按 (交易所, 是否鉴权, 网络路由) 复用长连接客户端，HTTP session 与 keep-alive 连接随之复用。
+
+    只有鉴权客户端需要校准时间差：创建时同步一次，之后由后台线程按固定间隔刷新，不占用请求路径。
+    """
+    use_proxy = use_proxy and bool(settings.exchange_proxy_url)
+    key = (exchange_name.lower(), require_auth, use_proxy)
+    with _pool_lock:
+        exchange = _client_pool.get(key)
+        if exchange is None:
+            exchange = create_exchange(exchange_name, require_auth, use_proxy=use_proxy)
+            if require_auth:
+                _sync_time(exchange)
+                _start_time_sync_thread()
+            _client_pool[key] = exchange
+    return exchange
+
+
+def _sync_time(exchange) -> None:
+    if not hasattr(exchange, "load_time_difference"):
+        return
     try:
-        if hasattr(exchange, "load_time_difference"):
-            exchange.load_time_difference()
-        server_time = exchange.fetch_time()
-        local_time = int(time.time() * 1000)
-        logger.info("%s 连接成功，服务器时间差: %s", exchange_name.upper(), abs(server_time - local_time))
+        exchange.load_time_difference()
+        logger.info("%s 时间差已同步: %sms", exchange.id.upper(), exchange.options.get("timeDifference"))
     except Exception as exc:
         logger.warning("同步交易所时间失败: %s", exc)
 
+
+def _time_sync_loop() -> None:
+    while True:
+        time.sleep(settings.exchange_time_sync_minutes * 60)
+        with _pool_lock:
+            clients = [exchange for (_, require_auth, _), exchange in _client_pool.items() if require_auth]
+        for exchange in clients:
+            _sync_time(exchange)
+
+
+def _start_time_sync_thread() -> None:
+    global _time_sync_thread
+    if _time_sync_thread is None:
+        _time_sync_thread = threading.Thread(target=_time_sync_loop, name="exchange-time-sync", daemon=True)
+        _time_sync_thread.start()
+
+
+def get_async_exchange(exchange_name: str = "binance", *, use_proxy: bool = True):
+    """事件循环内复用的异步公共客户端，按 (交易所, 网络路由) 缓存，应用关闭时由 :func:`close_async_exchanges` 释放。"""
+    use_proxy = use_proxy and bool(settings.exchange_proxy_url)
+    key = (exchange_name.lower(), use_proxy)
+    exchange = _async_client_pool.get(key)
+    if exchange is None:
+        exchange = _async_client_pool[key] = create_async_exchange(exchange_name, use_proxy=use_proxy)
     return exchange
+
+
+def exchange_semaphore(exchange_name: str) -> asyncio.Semaphore:
+    """单个交易所同时在途的请求上限，慢交易所只会占满自己的名额，不影响其他请求。"""
+    key = exchange_name.lower()
+    semaphore = _exchange_semaphores.get(key)
+    if semaphore is None:
+        semaphore = _exchange_semaphores[key] = asyncio.Semaphore(max(settings.exchange_max_concurrency, 1))
+    return semaphore
+
+
+async def close_async_exchanges() -> None:
+    clients = list(_async_client_pool.values())
+    _async_client_pool.clear()
+    for exchange in clients:
+        try:
+            await exchange.close()
+        except Exception as exc:
+            logger.warning("关闭异步交易所连接失败: %s", exc)
@@ -0,0 +1,343 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backend.app.schemas.chart import IndicatorSettings
+
+
+DAY_MS = 24 * 60 * 60 * 1000
+# 递推类指标的预热长度：种子的残余权重衰减到 e^-8（约万分之三）所需的K线数，即 8 / alpha。
+WARMUP_DECAY = 8
+
+
+def wilder_smoothing(series: pd.Series, period: int) -> pd.Series:
+    """Wilder 平滑：前 ``period`` 个值的简单均值作种子，之后逐行 ``(prev * (period - 1) + x) / period``。
+
+    这个递推就是从种子位置开始的 ``ewm(alpha=1 / period, adjust=False)``，交给 pandas 的 C 实现逐行计算，
+    与逐行 ``.iloc`` 读写的结果只差浮点舍入。种子之前的位置为 NaN，与 ``rolling(period).mean()`` 一致。
+    """
+    result = pd.Series(float("nan"), index=series.index, dtype="float64")
+    if period < 1 or len(series) < period:
+        return result
+    values = series.to_numpy(dtype="float64", copy=True)
+    # 种子沿用 rolling 的求和方式，保证第一个有效值与原实现逐位一致。
+    values[period - 1] = pd.Series(values[:period]).rolling(window=period).mean().iloc[-1]
+    smoothed = pd.Series(values[period - 1 :]).ewm(alpha=1 / period, adjust=False).mean()
+    result.iloc[period - 1 :] = smoothed.to_numpy()
+    return result
+
+
+def wilder_rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """Wilder RSI；涨跌幅平均都为 0 时为 NaN，只有上涨时为 100。"""
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    rs = wilder_smoothing(gain, period) / wilder_smoothing(loss, period)
+    return 100 - (100 / (1 + rs))
+
+
+def _ewm_continue(values: np.ndarray, previous: float | None, **ewm_kwargs) -> np.ndarray:
+    """``adjust=False`` 的 EMA 只依赖上一个值：把上一个值接在前面继续递推，结果与整段重算逐位一致。"""
+    if previous is None:
+        return pd.Series(values).ewm(adjust=False, **ewm_kwargs).mean().to_numpy()
+    extended = np.concatenate(([previous], values))
+    return pd.Series(extended).ewm(adjust=False, **ewm_kwargs).mean().to_numpy()[1:]
+
+
+def _wilder_continue(
+    values: np.ndarray, period: int, average: float | None, pending: tuple[float, ...]
+) -> tuple[np.ndarray, float | None, tuple[float, ...]]:
+    """续算 Wilder 平滑，返回 (本批结果, 新的平均值, 尚未凑够种子的值)。"""
+    if average is not None:
+        smoothed = _ewm_continue(values, average, alpha=1 / period)
+        return smoothed, (float(smoothed[-1]) if len(smoothed) else average), ()
+    combined = np.concatenate((np.asarray(pending, dtype="float64"), values))
+    if len(combined) < period:
+        return np.full(len(values), np.nan), None, tuple(combined.tolist())
+    smoothed = wilder_smoothing(pd.Series(combined), period).to_numpy()
+    return smoothed[len(pending) :], float(smoothed[-1]), ()
+
+
+def _window_sum(windows: np.ndarray, transform: Callable[[np.ndarray], np.ndarray] | None = None) -> np.ndarray:
+    """逐列累加每个窗口：累加顺序固定为窗口内从前到后，结果与窗口所在的批次、数组形状无关。"""
+    total = np.zeros(len(windows))
+    for offset in range(windows.shape[1]):
+        column = windows[:, offset]
+        total += column if transform is None else transform(column)
+    return total
+
+
+def _window_mean(windows: np.ndarray) -> np.ndarray:
+    return _window_sum(windows) / windows.shape[1]
+
+
+def _window_std(windows: np.ndarray, mean: np.ndarray, ddof: int = 1) -> np.ndarray:
+    return np.sqrt(_window_sum(windows, lambda column: (column - mean) ** 2) / (windows.shape[1] - ddof))
+
+
+def _sliding_windows(values: np.ndarray, tail: np.ndarray, period: int) -> tuple[np.ndarray, int, np.ndarray]:
+    """本批每一行结尾的 ``period`` 长窗口，``tail`` 是上一批留下的最后 ``period - 1`` 个值。
+
+    返回 (窗口视图, 第一个凑满窗口的行号, 新的 ``tail``)；窗口不复制数据，开销与 ``period`` 成正比。
+    """
+    extended = np.concatenate((tail, values))
+    first_row = max(period - 1 - len(tail), 0)
+    if len(extended) < period:
+        windows = np.empty((0, period))
+    else:
+        windows = sliding_window_view(extended, period)[len(tail) + first_row - period + 1 :]
+    return windows, first_row, extended[max(len(extended) - period + 1, 0) :].copy()
+
+
+def _periods(values: list[int]) -> list[int]:
+    return sorted({int(period) for period in values if int(period) > 0})
+
+
+def _ema_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    close, state = inputs["close"], state or {}
+    columns, next_state = {}, {}
+    for period in _periods(settings.ema.periods):
+        columns[f"ema_{period}"] = _ewm_continue(close, state.get(period), span=period)
+        next_state[period] = float(columns[f"ema_{period}"][-1])
+    return columns, next_state
+
+
+def _sma_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    close, state = inputs["close"], state or {}
+    columns, next_state = {}, {}
+    for period in _periods(settings.sma.periods):
+        windows, first_row, next_state[period] = _sliding_windows(close, state.get(period, close[:0]), period)
+        columns[f"sma_{period}"] = np.full(len(close), np.nan)
+        columns[f"sma_{period}"][first_row:] = _window_mean(windows)
+    return columns, next_state
+
+
+def _rsi_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    close, state = inputs["close"], state or {}
+    period = settings.rsi.period
+    if state.get("last_close") is None:
+        delta = pd.Series(close).diff()
+    else:
+        delta = pd.Series(np.concatenate(([state["last_close"]], close))).diff().iloc[1:].reset_index(drop=True)
+    gain = delta.where(delta > 0, 0).to_numpy(dtype="float64")
+    loss = (-delta.where(delta < 0, 0)).to_numpy(dtype="float64")
+    avg_gain, next_gain, pending_gains = _wilder_continue(gain, period, state.get("avg_gain"), state.get("pending_gains", ()))
+    avg_loss, next_loss, pending_losses = _wilder_continue(loss, period, state.get("avg_loss"), state.get("pending_losses", ()))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+    next_state = {
+        "last_close": float(close[-1]),
+        "avg_gain": next_gain,
+        "avg_loss": next_loss,
+        "pending_gains": pending_gains,
+        "pending_losses": pending_losses,
+    }
+    return {"rsi": rsi}, next_state
+
+
+def _macd_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    close, state, macd_settings = inputs["close"], state or {}, settings.macd
+    fast = _ewm_continue(close, state.get("fast"), span=macd_settings.fast_period)
+    slow = _ewm_continue(close, state.get("slow"), span=macd_settings.slow_period)
+    macd = fast - slow
+    signal = _ewm_continue(macd, state.get("signal"), span=macd_settings.signal_period)
+    next_state = {"fast": float(fast[-1]), "slow": float(slow[-1]), "signal": float(signal[-1])}
+    return {"macd": macd, "signal": signal, "histogram": macd - signal}, next_state
+
+
+def _bollinger_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    close, bollinger = inputs["close"], settings.bollinger
+    windows, first_row, tail = _sliding_windows(close, (state or {}).get("tail", close[:0]), bollinger.period)
+    middle, width = np.full(len(close), np.nan), np.full(len(close), np.nan)
+    middle[first_row:] = _window_mean(windows)
+    # 与旧版 Dash 页面一致，标准差取样本标准差（ddof=1）。
+    width[first_row:] = _window_std(windows, middle[first_row:]) * bollinger.std_dev
+    columns = {"bollinger_upper": middle + width, "bollinger_middle": middle, "bollinger_lower": middle - width}
+    return columns, {"tail": tail}
+
+
+def _atr_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    high, low, close, state = inputs["high"], inputs["low"], inputs["close"], state or {}
+    previous_close = np.concatenate(([state.get("last_close", np.nan)], close[:-1]))
+    # 首根没有前收盘价，真实波幅就是最高价减最低价。
+    with np.errstate(invalid="ignore"):
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    atr, average, pending = _wilder_continue(true_range, settings.atr.period, state.get("average"), state.get("pending", ()))
+    return {"atr": atr}, {"last_close": float(close[-1]), "average": average, "pending": pending}
+
+
+def _vwap_kernel(inputs: dict[str, np.ndarray], settings: IndicatorSettings, state: dict | None):
+    state = state or {}
+    typical = (inputs["high"] + inputs["low"] + inputs["close"]) / 3
+    volume = inputs["volume"]
+    price_volume = typical * volume
+    anchors = inputs["timestamp"] // DAY_MS if settings.vwap.anchor == "day" else np.zeros(len(volume), dtype="int64")
+    breaks = np.flatnonzero(np.diff(anchors)) + 1
+
+    vwap = np.empty(len(volume))
+    anchor, total_pv, total_volume = state.get("anchor"), state.get("price_volume", 0.0), state.get("volume", 0.0)
+    for start, end in zip(np.concatenate(([0], breaks)), np.concatenate((breaks, [len(volume)]))):
+        if anchors[start] != anchor:
+            anchor, total_pv, total_volume = int(anchors[start]), 0.0, 0.0
+        # 累计值接在上一批末尾之后逐项相加，分批与整段的累加顺序相同。
+        cumulative_pv = np.cumsum(np.concatenate(([total_pv], price_volume[start:end])))[1:]
+        cumulative_volume = np.cumsum(np.concatenate(([total_volume], volume[start:end])))[1:]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap[start:end] = np.where(cumulative_volume > 0, cumulative_pv / cumulative_volume, np.nan)
+        total_pv, total_volume = float(cumulative_pv[-1]), float(cumulative_volume[-1])
+    return {"vwap": vwap}, {"anchor": anchor, "price_volume": total_pv, "volume": total_volume}
+
+
+@dataclass(frozen=True)
+class Indicator:
+    """注册表里的一个指标。
+
+    ``inputs`` 是用到的K线列，参数取自 ``IndicatorSettings`` 里与 ``name`` 同名的字段，``warmup``
+    是图表首根之前需要多少根K线才能让输出与长历史一致，``kernel`` 接收本批输入数组和上一批留下的状态，
+    返回本批各输出列和新状态（不得修改传入的状态）。``periodic`` 的指标按周期输出多条线，
+    序列化为 ``<name>_series``。
+    """
+
+    name: str
+    inputs: tuple[str, ...]
+    columns: Callable[[IndicatorSettings], list[str]]
+    warmup: Callable[[IndicatorSettings], int]
+    kernel: Callable[[dict[str, np.ndarray], IndicatorSettings, Any], tuple[dict[str, np.ndarray], Any]]
+    periodic: bool = False
+
+    def params(self, settings: IndicatorSettings):
+        return getattr(settings, self.name)
+
+
+def _ema_warmup(span: int) -> int:
+    return WARMUP_DECAY * (span + 1) // 2
+
+
+INDICATORS: dict[str, Indicator] = {
+    indicator.name: indicator
+    for indicator in (
+        Indicator(
+            name="ema",
+            inputs=("close",),
+            columns=lambda settings: [f"ema_{period}" for period in _periods(settings.ema.periods)],
+            warmup=lambda settings: max((_ema_warmup(period) for period in _periods(settings.ema.periods)), default=0),
+            kernel=_ema_kernel,
+            periodic=True,
+        ),
+        Indicator(
+            name="sma",
+            inputs=("close",),
+            columns=lambda settings: [f"sma_{period}" for period in _periods(settings.sma.periods)],
+            warmup=lambda settings: max(_periods(settings.sma.periods), default=1) - 1,
+            kernel=_sma_kernel,
+            periodic=True,
+        ),
+        Indicator(
+            name="bollinger",
+            inputs=("close",),
+            columns=lambda settings: ["bollinger_upper", "bollinger_middle", "bollinger_lower"],
+            warmup=lambda settings: settings.bollinger.period - 1,
+            kernel=_bollinger_kernel,
+        ),
+        Indicator(
+            name="vwap",
+            inputs=("timestamp", "high", "low", "close", "volume"),
+            columns=lambda settings: ["vwap"],
+            # 按自然日锚定时当天第一根之前的数据不参与计算；不锚定时从图表首根累计，同样不需要预热。
+            warmup=lambda settings: 0,
+            kernel=_vwap_kernel,
+        ),
+        Indicator(
+            name="rsi",
+            inputs=("close",),
+            columns=lambda settings: ["rsi"],
+            warmup=lambda settings: WARMUP_DECAY * settings.rsi.period + 1,
+            kernel=_rsi_kernel,
+        ),
+        Indicator(
+            name="macd",
+            inputs=("close",),
+            columns=lambda settings: ["macd", "signal", "histogram"],
+            warmup=lambda settings: _ema_warmup(max(settings.macd.fast_period, settings.macd.slow_period))
+            + _ema_warmup(settings.macd.signal_period),
+            kernel=_macd_kernel,
+        ),
+        Indicator(
+            name="atr",
+            inputs=("high", "low", "close"),
+            columns=lambda settings: ["atr"],
+            warmup=lambda settings: WARMUP_DECAY * settings.atr.period + 1,
+            kernel=_atr_kernel,
+        ),
+    )
+}
+
+
+def _approx_bytes(value) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(16 + _approx_bytes(item) for item in value.values())
+    if isinstance(value, (tuple, list)):
+        return sum(16 + _approx_bytes(item) for item in value)
+    return 16
+
+
+@dataclass(frozen=True)
+class IndicatorState:
+    """一条K线序列算到最后一根时各指标的递推状态，只对生成它的那组指标参数有效。"""
+
+    rows: int = 0
+    states: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def approx_bytes(self) -> int:
+        return 256 + _approx_bytes(self.states)
+
+
+def _input_array(frame: pd.DataFrame, column: str) -> np.ndarray:
+    if column == "timestamp":
+        timestamps = frame["timestamp"]
+        if pd.api.types.is_datetime64_any_dtype(timestamps):
+            return timestamps.to_numpy(dtype="datetime64[ms]").astype("int64")
+        return timestamps.to_numpy(dtype="int64")
+    return frame[column].to_numpy(dtype="float64")
+
+
+class IndicatorEngine:
+    """按指标参数逐批推进 ``enabled`` 里的指标：每批只处理新K线，从上一批留下的状态接着递推。
+
+    从空状态一次算完整段与分成任意多批续算得到的结果一致，追加 N 根K线的开销是 O(N)，
+    既用于加载更多，也可以逐根喂入实时K线。状态对象不可变，调用方可以保留收盘前的状态，
+    未收盘K线更新时从同一个状态重算。
+    """
+
+    def __init__(self, indicator_settings: IndicatorSettings | None = None) -> None:
+        self.settings = indicator_settings or IndicatorSettings()
+        enabled = set(self.settings.enabled)
+        self.indicators = [indicator for name, indicator in INDICATORS.items() if name in enabled]
+
+    @property
+    def warmup(self) -> int:
+        return max((indicator.warmup(self.settings) for indicator in self.indicators), default=0)
+
+    def run(self, frame: pd.DataFrame, state: IndicatorState | None = None) -> tuple[pd.DataFrame, IndicatorState]:
+        """计算 ``frame`` 这一批K线的指标列（与 ``frame`` 同索引），返回指标列和推进后的状态。"""
+        state = state or IndicatorState()
+        if frame.empty or not self.indicators:
+            return pd.DataFrame(index=frame.index), IndicatorState(state.rows + len(frame), state.states)
+
+        needed = {column for indicator in self.indicators for column in indicator.inputs}
+        inputs = {column: _input_array(frame, column) for column in needed}
+        columns: dict[str, np.ndarray] = {}
+        states = dict(state.states)
+        for indicator in self.indicators:
+            output, states[indicator.name] = indicator.kernel(inputs, self.settings, state.states.get(indicator.name))
+            columns.update(output)
+        return pd.DataFrame(columns, index=frame.index), IndicatorState(state.rows + len(frame), states)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+
+from backend.app.core.config import settings
+from backend.app.services.file_lock import atomic_write
+
+
+logger = logging.getLogger(__name__)
+_markets_lock = threading.Lock()
+_markets_memory: dict[tuple[str, str], dict] = {}
+
+
+def _markets_key(exchange) -> tuple[str, str]:
+    return exchange.id, str(exchange.options.get("defaultType") or "spot")
+
+
+def _markets_file(key: tuple[str, str]) -> Path:
+    return settings.markets_cache_dir / f"{key[0]}_{key[1]}.json"
+
+
+def _is_fresh(snapshot: dict | None) -> bool:
+    if not snapshot:
+        return False
+    return time.time() - snapshot["fetched_at"] < settings.markets_refresh_hours * 3600
+
+
+def _read_snapshot(key: tuple[str, str]) -> dict | None:
+    markets_file = _markets_file(key)
+    if not markets_file.exists():
+        return None
+    try:
+        with markets_file.open("r", encoding="utf-8") as file:
+            return json.load(file)
+    except Exception as exc:
+        logger.warning("读取市场缓存失败: %s (%s)", markets_file, exc)
+        return None
+
+
+def _write_snapshot(key: tuple[str, str], snapshot: dict) -> None:
+    def _dump(temp_path: Path) -> None:
+        with temp_path.open("w", encoding="utf-8") as file:
+            json.dump(snapshot, file, default=str)
+
+    try:
+        atomic_write(_markets_file(key), _dump)
+    except Exception as exc:
+        logger.warning("写入市场缓存失败: %s", exc)
+
+
+def _cached_snapshot(key: tuple[str, str], reload: bool) -> dict | None:
+    snapshot = None if reload else _markets_memory.get(key)
+    if not _is_fresh(snapshot) and not reload:
+        snapshot = _read_snapshot(key)
+    return snapshot if _is_fresh(snapshot) else None
+
+
+def _store_snapshot(key: tuple[str, str], markets: dict, currencies: dict | None) -> dict:
+    snapshot = {"fetched_at": time.time(), "markets": markets, "currencies": currencies or {}}
+    _write_snapshot(key, snapshot)
+    logger.info("%s 市场数据已刷新: %s 个交易对", key[0].upper(), len(markets))
+    return snapshot
+
+
+def _apply_snapshot(exchange, snapshot: dict) -> dict:
+    if getattr(exchange, "markets_snapshot_at", None) != snapshot["fetched_at"]:
+        exchange.set_markets(snapshot["markets"], snapshot["currencies"] or None)
+        exchange.markets_snapshot_at = snapshot["fetched_at"]
+    return exchange.markets
+
+
+# ccxt ``set_markets`` 建好的全部市场索引，共享时整体引用。
+MARKET_ATTRIBUTES = ("markets", "markets_by_id", "symbols", "ids", "currencies", "currencies_by_id", "codes")
+
+
+def share_markets(source, target) -> dict:
+    """让 ``target`` 直接引用 ``source`` 已装载的市场索引，多个实例只读共享同一份，不再各自 ``set_markets``。"""
+    for attribute in MARKET_ATTRIBUTES:
+        if hasattr(source, attribute):
+            setattr(target, attribute, getattr(source, attribute))
+    target.markets_snapshot_at = getattr(source, "markets_snapshot_at", None)
+    return target.markets
+
+
+def load_markets(exchange, *, reload: bool = False) -> dict:
+    """给 ccxt 实例装载市场元数据，优先用内存和磁盘快照，过期后才请求交易所。
+
+    装载后 ``exchange.markets`` 已就绪，ccxt 内部再调用 ``load_markets()`` 会直接返回，
+    交易对解析、精度换算和合约枚举都变成本地查找。
+    """
+    key = _markets_key(exchange)
+    with _markets_lock:
+        snapshot = _cached_snapshot(key, reload)
+        if snapshot is None:
+            markets = exchange.load_markets(reload=True)
+            snapshot = _store_snapshot(key, markets, exchange.currencies)
+        _markets_memory[key] = snapshot
+    return _apply_snapshot(exchange, snapshot)
+
+
+async def load_markets_async(exchange, *, reload: bool = False) -> dict:
+    """:func:`load_markets` 的 ``ccxt.async_support`` 版本，与同步客户端共用同一份快照。"""
+    key = _markets_key(exchange)
+    snapshot = await asyncio.to_thread(_cached_snapshot, key, reload)
+    if snapshot is None:
+        markets = await exchange.load_markets(reload=True)
+        snapshot = await asyncio.to_thread(_store_snapshot, key, markets, exchange.currencies)
+    _markets_memory[key] = snapshot
+    return _apply_snapshot(exchange, snapshot)
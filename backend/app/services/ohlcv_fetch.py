@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from backend.app.services.exchange import exchange_semaphore
+
+
+logger = logging.getLogger(__name__)
+
+# 各交易所 K线接口单页上限：币安合约 klines 为 1500（现货 1000），OKX 历史 K线接口为 100。
+OHLCV_PAGE_LIMITS: dict[tuple[str, str | None], int] = {
+    ("binance", "future"): 1500,
+    ("binance", "delivery"): 1500,
+    ("binance", None): 1000,
+    ("okx", None): 100,
+}
+DEFAULT_OHLCV_PAGE_LIMIT = 500
+
+
+def ohlcv_page_limit(exchange) -> int:
+    default_type = exchange.options.get("defaultType")
+    return OHLCV_PAGE_LIMITS.get(
+        (exchange.id, default_type),
+        OHLCV_PAGE_LIMITS.get((exchange.id, None), DEFAULT_OHLCV_PAGE_LIMIT),
+    )
+
+
+def plan_ohlcv_pages(since: int, until: int, timeframe_ms: int, page_limit: int) -> list[tuple[int, int]]:
+    """把闭区间 ``[since, until]`` 切成每页最多 ``page_limit`` 根K线的闭区间，页与页首尾相接。"""
+    span = timeframe_ms * page_limit
+    return [(start, min(start + span - 1, until)) for start in range(since, until + 1, span)]
+
+
+async def _fetch_page(exchange, symbol: str, timeframe: str, start: int, end: int, page_limit: int) -> list[list]:
+    """拉取一页；交易所实际返回条数少于计划时（单页上限更小或有停牌空洞）从最后一根继续补齐本页。"""
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    rows: list[list] = []
+    cursor = start
+    while cursor <= end:
+        async with exchange_semaphore(exchange.id):
+            batch = await exchange.fetch_ohlcv(
+                symbol=symbol,
+                timeframe=timeframe,
+                since=cursor,
+                limit=page_limit,
+                params={"until": end},
+            )
+        batch = [candle for candle in batch if cursor <= candle[0] <= end]
+        if not batch:
+            break
+        rows.extend(batch)
+        cursor = batch[-1][0] + timeframe_ms
+    return rows
+
+
+async def fetch_ohlcv_range(
+    exchange, symbol: str, timeframe: str, since: int | None, until: int | None
+) -> list[list]:
+    """按交易所单页上限规划分页，并发拉取后按时间顺序拼回完整区间。
+
+    并发度受每个交易所的信号量约束，节奏由共享限频器控制。
+    """
+    page_limit = ohlcv_page_limit(exchange)
+    if since is None or until is None:
+        async with exchange_semaphore(exchange.id):
+            return await exchange.fetch_ohlcv(symbol=symbol, timeframe=timeframe, limit=page_limit)
+
+    timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+    pages = plan_ohlcv_pages(since, until, timeframe_ms, page_limit)
+    if len(pages) > 1:
+        logger.info("%s %s %s 分 %s 页并发拉取K线", exchange.id.upper(), symbol, timeframe, len(pages))
+    results = await asyncio.gather(
+        *(_fetch_page(exchange, symbol, timeframe, start, end, page_limit) for start, end in pages)
+    )
+    rows: list[list] = []
+    last_timestamp = None
+    for page_rows in results:
+        for candle in page_rows:
+            if last_timestamp is None or candle[0] > last_timestamp:
+                rows.append(candle)
+                last_timestamp = candle[0]
+    return rows
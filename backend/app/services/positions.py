@@ -5,21 +5,56 @@ import time
 
 import pandas as pd
 
-from backend.app.services.exchange import create_exchange
+from backend.app.services.exchange import get_exchange
+from backend.app.services.markets import load_markets
+from backend.app.services.trade_windows import fetch_my_trades_adaptive
 
 
 logger = logging.getLogger(__name__)
 
 
+def _fetch_filled_orders(exchange, symbol: str, since: int, until: int, limit: int) -> list[dict]:
+    """不支持成交查询时用已成交订单近似成交记录，按 7 天窗口逐段查询。"""
+    seven_days_ms = 7 * 24 * 60 * 60 * 1000
+    trades = []
+    current_since = since
+    while current_since < until:
+        current_until = min(current_since + seven_days_ms - 1, until)
+        params = {"startTime": current_since, "endTime": current_until}
+        try:
+            orders = exchange.fetch_orders(symbol=symbol, limit=limit, params=params)
+        except Exception as exc:
+            logger.warning("获取交易记录失败: %s", exc)
+            orders = []
+        for order in orders:
+            if order.get("status") in ["closed", "filled"] and order.get("filled", 0) > 0:
+                trades.append(
+                    {
+                        "id": order.get("id"),
+                        "timestamp": order.get("timestamp"),
+                        "datetime": order.get("datetime"),
+                        "symbol": order.get("symbol"),
+                        "side": order.get("side"),
+                        "price": order.get("price"),
+                        "amount": order.get("filled"),
+                        "cost": order.get("cost"),
+                        "fee": order.get("fee"),
+                        "info": order.get("info"),
+                    }
+                )
+        current_since = current_until + 1
+    return trades
+
+
 def fetch_trades(exchange_name: str, symbol: str, since: int | None, until: int | None, limit: int = 100) -> pd.DataFrame:
     try:
-        exchange = create_exchange(exchange_name, require_auth=True)
+        exchange = get_exchange(exchange_name, require_auth=True)
     except ValueError:
         return pd.DataFrame()
     if not getattr(exchange, "apiKey", None) or not getattr(exchange, "secret", None):
         return pd.DataFrame()
 
-    exchange.load_markets()
+    load_markets(exchange)
     original_symbol = symbol
     if ":" not in symbol and symbol.endswith("USDT") and exchange.options.get("defaultType") in {"future", "futures"}:
         symbol = f"{symbol}:USDT"
@@ -29,43 +64,12 @@ def fetch_trades(exchange_name: str, symbol: str, since: int | None, until: int
     current_time = int(time.time() * 1000)
     until = until or current_time
     since = since or (until - 30 * 24 * 60 * 60 * 1000)
-    seven_days_ms = 7 * 24 * 60 * 60 * 1000
 
-    all_trades = []
-    current_since = since
-    while current_since < until:
-        current_until = min(current_since + seven_days_ms - 1, until)
-        params = {
-            "startTime": current_since,
-            "endTime": current_until,
-            "recvWindow": 60000,
-        }
-        try:
-            batch_trades = exchange.fetch_my_trades(symbol=symbol, limit=limit, params=params)
-            if batch_trades:
-                all_trades.extend(batch_trades)
-        except Exception:
-            try:
-                orders = exchange.fetch_orders(symbol=symbol, limit=limit, params=params)
-                for order in orders:
-                    if order.get("status") in ["closed", "filled"] and order.get("filled", 0) > 0:
-                        all_trades.append(
-                            {
-                                "id": order.get("id"),
-                                "timestamp": order.get("timestamp"),
-                                "datetime": order.get("datetime"),
-                                "symbol": order.get("symbol"),
-                                "side": order.get("side"),
-                                "price": order.get("price"),
-                                "amount": order.get("filled"),
-                                "cost": order.get("cost"),
-                                "fee": order.get("fee"),
-                                "info": order.get("info"),
-                            }
-                        )
-            except Exception as exc:
-                logger.warning("获取交易记录失败: %s", exc)
-        current_since = current_until + 1
+    try:
+        all_trades = fetch_my_trades_adaptive(exchange, symbol, since, until)
+    except Exception as exc:
+        logger.warning("获取成交记录失败，改用已成交订单: %s", exc)
+        all_trades = _fetch_filled_orders(exchange, symbol, since, until, limit)
 
     if not all_trades:
         return pd.DataFrame()
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from pathlib import Path
+
+from backend.app.core.config import settings
+from backend.app.services.file_lock import FileLock, atomic_write
+
+
+logger = logging.getLogger(__name__)
+
+# 币安按 IP 计权重：合约 2400/分钟，现货 6000/分钟，sapi 12000/分钟。
+# ccxt 给合约接口标注的 cost 就是文档权重；现货与 sapi 的 cost 按 1200/分钟 折算过，需乘 5 还原。
+BINANCE_BUCKETS: dict[str, tuple[int, int, float]] = {
+    "fapi": (2400, 60_000, 1.0),
+    "dapi": (2400, 60_000, 1.0),
+    "sapi": (12000, 60_000, 5.0),
+    "api": (6000, 60_000, 5.0),
+}
+BINANCE_USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+
+# OKX 按接口单独限频（次数, 窗口毫秒），未列出的接口共用一个按 ccxt cost 计数的默认桶。
+OKX_ENDPOINT_LIMITS: dict[str, tuple[int, int]] = {
+    "market/candles": (40, 2000),
+    "market/history-candles": (20, 2000),
+    "public/instruments": (20, 2000),
+    "public/time": (10, 2000),
+    "trade/fills": (60, 2000),
+    "trade/fills-history": (10, 2000),
+    "account/bills": (5, 1000),
+    "account/bills-archive": (5, 2000),
+    "account/positions": (10, 2000),
+}
+OKX_DEFAULT_LIMIT = (20, 2000)
+
+# 429/418 没有带 Retry-After 时的退避时长。
+DEFAULT_BACKOFF_MS = 2000
+
+
+def _now_ms() -> float:
+    return time.time() * 1000
+
+
+def _binance_bucket(api, cost: float) -> tuple[str, int, int, float]:
+    api_name = api if isinstance(api, str) else str(api[0])
+    for prefix in ("fapi", "dapi", "sapi"):
+        if api_name.startswith(prefix):
+            limit, window_ms, scale = BINANCE_BUCKETS[prefix]
+            return prefix, limit, window_ms, cost * scale
+    limit, window_ms, scale = BINANCE_BUCKETS["api"]
+    return "api", limit, window_ms, cost * scale
+
+
+def resolve_bucket(exchange_id: str, api, path: str, cost: float) -> tuple[str, int, int, float]:
+    """把一次 ccxt 请求映射到 (桶名, 限额, 窗口毫秒, 本次消耗)。"""
+    if exchange_id == "binance":
+        return _binance_bucket(api, cost)
+    if exchange_id == "okx":
+        if path in OKX_ENDPOINT_LIMITS:
+            limit, window_ms = OKX_ENDPOINT_LIMITS[path]
+            return path, limit, window_ms, 1.0
+        limit, window_ms = OKX_DEFAULT_LIMIT
+        return "default", limit, window_ms, cost
+    return "default", 20, 1000, cost
+
+
+class RateLimiter:
+    """按交易所共享的令牌桶限频器，状态落在文件里并用文件锁保护，同机的线程、脚本进程和 API 服务共用一份额度。
+
+    取令牌时允许余额变成负数（预约），调用方在锁外按欠额休眠，并发请求因此被均匀排开，
+    吞吐贴着限额运行；响应头里的已用权重和 Retry-After 会回写到桶里，与服务端保持一致。
+    """
+
+    def __init__(self, state_dir: Path, headroom: float) -> None:
+        self.state_dir = state_dir
+        self.headroom = headroom
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_ms = 0.0
+        self.rate_limited = 0
+
+    def _state_path(self, exchange_id: str) -> Path:
+        return self.state_dir / f"{exchange_id}.json"
+
+    def _update(self, exchange_id: str, mutate) -> float:
+        state_path = self._state_path(exchange_id)
+        with FileLock(state_path.with_suffix(".lock")):
+            try:
+                state = json.loads(state_path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, ValueError):
+                state = {}
+            result = mutate(state, _now_ms())
+            # 原地改写时进程中途崩溃会留下半截 JSON，其他进程读到后会退回满桶，跨进程额度就失效了。
+            payload = json.dumps(state)
+            atomic_write(state_path, lambda temp_path: temp_path.write_text(payload, encoding="utf-8"))
+        return result
+
+    def _refill(self, state: dict, bucket: str, capacity: float, window_ms: int, now: float) -> dict:
+        entry = state.setdefault("buckets", {}).setdefault(bucket, {"tokens": capacity, "updated_at": now})
+        rate = capacity / window_ms
+        entry["tokens"] = min(capacity, entry["tokens"] + (now - entry["updated_at"]) * rate)
+        entry["updated_at"] = now
+        return entry
+
+    def reserve(self, exchange_id: str, bucket: str, limit: int, window_ms: int, weight: float) -> float:
+        """预约 ``weight`` 个令牌并立即返回，调用方需要先等待返回的毫秒数再发请求。"""
+        capacity = limit * self.headroom
+
+        def _reserve(state: dict, now: float) -> float:
+            entry = self._refill(state, bucket, capacity, window_ms, now)
+            entry["tokens"] -= weight
+            deficit_wait = -entry["tokens"] / (capacity / window_ms) if entry["tokens"] < 0 else 0.0
+            return max(deficit_wait, state.get("blocked_until", 0) - now, 0.0)
+
+        wait_ms = self._update(exchange_id, _reserve)
+        if wait_ms > 0:
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_ms += wait_ms
+        return wait_ms
+
+    def acquire(self, exchange_id: str, bucket: str, limit: int, window_ms: int, weight: float) -> float:
+        """预约令牌并阻塞到轮到自己，返回实际等待的毫秒数。"""
+        wait_ms = self.reserve(exchange_id, bucket, limit, window_ms, weight)
+        if wait_ms > 0:
+            time.sleep(wait_ms / 1000)
+        return wait_ms
+
+    async def acquire_async(self, exchange_id: str, bucket: str, limit: int, window_ms: int, weight: float) -> float:
+        """``acquire`` 的协程版本：文件锁操作放到线程里，等待用 ``asyncio.sleep`` 不占事件循环。"""
+        wait_ms = await asyncio.to_thread(self.reserve, exchange_id, bucket, limit, window_ms, weight)
+        if wait_ms > 0:
+            await asyncio.sleep(wait_ms / 1000)
+        return wait_ms
+
+    def available(self, exchange_id: str, bucket: str, limit: int, window_ms: int) -> float:
+        """桶里当前可用的令牌数（扣除限频暂停期），用于估算一批请求要排队多久。"""
+        capacity = limit * self.headroom
+
+        def _peek(state: dict, now: float) -> float:
+            entry = self._refill(state, bucket, capacity, window_ms, now)
+            blocked_ms = max(state.get("blocked_until", 0) - now, 0.0)
+            return entry["tokens"] - blocked_ms * capacity / window_ms
+
+        return self._update(exchange_id, _peek)
+
+    def observe(self, exchange_id: str, bucket: str, limit: int, window_ms: int, status: int, headers) -> None:
+        """根据响应同步额度：币安的已用权重头收紧本地余额，429/418 按 Retry-After 暂停该交易所的全部请求。"""
+        headers = {str(key).lower(): value for key, value in (headers or {}).items()}
+        used_weight = headers.get(BINANCE_USED_WEIGHT_HEADER) if exchange_id == "binance" else None
+        limited = status in (418, 429)
+        if used_weight is None and not limited:
+            return
+
+        capacity = limit * self.headroom
+        retry_after = headers.get("retry-after")
+        backoff_ms = float(retry_after) * 1000 if retry_after and str(retry_after).isdigit() else DEFAULT_BACKOFF_MS
+
+        def _sync(state: dict, now: float) -> None:
+            entry = self._refill(state, bucket, capacity, window_ms, now)
+            if used_weight is not None:
+                entry["tokens"] = min(entry["tokens"], capacity - float(used_weight))
+            if limited:
+                state["blocked_until"] = max(state.get("blocked_until", 0), now + backoff_ms)
+
+        self._update(exchange_id, _sync)
+        if limited:
+            with self._stats_lock:
+                self.rate_limited += 1
+            logger.warning("%s 触发限频 (HTTP %s)，暂停 %.1f 秒", exchange_id.upper(), status, backoff_ms / 1000)
+
+    def stats(self) -> dict[str, float]:
+        with self._stats_lock:
+            return {"waits": self.waits, "wait_ms": round(self.wait_ms, 1), "rate_limited": self.rate_limited}
+
+
+rate_limiter = RateLimiter(settings.rate_limit_state_dir, settings.rate_limit_headroom)
+
+
+def install_rate_limiter(exchange, limiter: RateLimiter = rate_limiter):
+    """把 ccxt 实例的 ``throttle`` 换成共享限频器，并在响应回调里读取限频相关的响应头。
+
+    ccxt 在同一线程（异步客户端则是同一任务）里依次调用 ``calculate_rate_limiter_cost`` → ``throttle``
+    → ``on_rest_response``，这里用 ContextVar 把本次请求对应的桶从前一步带到后一步。
+    同步与 ``ccxt.async_support`` 客户端都适用。
+    """
+    current_request: ContextVar[tuple | None] = ContextVar("rate_limit_request", default=None)
+    current_bucket: ContextVar[tuple | None] = ContextVar("rate_limit_bucket", default=None)
+    calculate_cost = exchange.calculate_rate_limiter_cost
+    on_rest_response = exchange.on_rest_response
+
+    def _calculate_cost(api, method, path, params, config={}):
+        cost = calculate_cost(api, method, path, params, config)
+        current_request.set((api, path, cost))
+        return cost
+
+    def _resolve(cost) -> tuple[str, int, int, float]:
+        api, path, request_cost = current_request.get() or ("public", "", cost or 1)
+        bucket_info = resolve_bucket(exchange.id, api, path, request_cost)
+        current_bucket.set(bucket_info)
+        return bucket_info
+
+    def _throttle(cost=None):
+        limiter.acquire(exchange.id, *_resolve(cost))
+
+    async def _throttle_async(cost=None):
+        await limiter.acquire_async(exchange.id, *_resolve(cost))
+
+    def _on_rest_response(code, reason, url, method, response_headers, response_body, request_headers, request_body):
+        bucket_info = current_bucket.get()
+        if bucket_info is not None:
+            bucket, limit, window_ms, _ = bucket_info
+            try:
+                limiter.observe(exchange.id, bucket, limit, window_ms, int(code), response_headers)
+            except Exception as exc:
+                logger.warning("更新限频状态失败: %s", exc)
+        return on_rest_response(
+            code, reason, url, method, response_headers, response_body, request_headers, request_body
+        )
+
+    exchange.calculate_rate_limiter_cost = _calculate_cost
+    exchange.throttle = _throttle_async if inspect.iscoroutinefunction(exchange.throttle) else _throttle
+    exchange.on_rest_response = _on_rest_response
+    return exchange
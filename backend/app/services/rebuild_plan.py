@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import math
+import time
+from datetime import datetime, timezone
+
+import ccxt
+
+from backend.app.services.exchange import create_exchange
+from backend.app.services.markets import load_markets
+from backend.app.services.rate_limit import RateLimiter, rate_limiter, resolve_bucket
+from backend.app.services.route_health import route_health
+from backend.app.services.trade_archive import TradeArchive, trade_archive
+from backend.app.services.trade_discovery import (
+    BINANCE_INCOME_PAGE_LIMIT,
+    DISCOVERY_RETENTION_MS,
+    DISCOVERY_SOURCES,
+    OKX_FILLS_PAGE_LIMIT,
+    usdt_contract_symbols,
+)
+from backend.app.services.trade_windows import trade_window_limits
+
+
+# 没有实测延迟时按单次请求 300ms 估算。
+DEFAULT_REQUEST_LATENCY_MS = 300
+MAX_SUGGESTED_THREADS = 32
+
+# 各阶段用到的接口 (api, method, path)，单次权重从 ccxt 的接口定义里读取。
+PLAN_ENDPOINTS: dict[str, dict[str, tuple[str, str, str]]] = {
+    "binance": {
+        "connect": ("fapiPublic", "get", "time"),
+        "positions": ("fapiPrivateV3", "get", "positionRisk"),
+        "discovery": ("fapiPrivate", "get", "income"),
+        "trades": ("fapiPrivate", "get", "userTrades"),
+    },
+    "okx": {
+        "connect": ("public", "get", "public/time"),
+        "positions": ("private", "get", "account/positions"),
+        "discovery": ("private", "get", "trade/fills-history"),
+        "trades": ("private", "get", "trade/fills-history"),
+    },
+}
+DISCOVERY_PAGE_LIMITS = {"binance": BINANCE_INCOME_PAGE_LIMIT, "okx": OKX_FILLS_PAGE_LIMIT}
+# 每笔成交大约产生多少条流水：币安有手续费和已实现盈亏两条，OKX 成交明细一条。
+DISCOVERY_ROWS_PER_TRADE = {"binance": 2, "okx": 1}
+
+
+def _date_to_ms(value: str) -> int:
+    return int(datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def _endpoint_weight(metadata, endpoint: tuple[str, str, str]) -> tuple[str, int, int, float]:
+    api, method, path = endpoint
+    config = getattr(metadata, "api", {}).get(api, {}).get(method, {}).get(path, {})
+    cost = config.get("cost", 1) if isinstance(config, dict) else float(config or 1)
+    return resolve_bucket(metadata.id, api, path, cost)
+
+
+def _request_latency_ms(exchange_name: str) -> float:
+    routes = route_health.stats().get(exchange_name, {})
+    latencies = [state["latency_ms"] for state in routes.get("routes", {}).values() if state.get("latency_ms")]
+    return min(latencies) if latencies else DEFAULT_REQUEST_LATENCY_MS
+
+
+def _discovery_available(exchange_id: str, since: int) -> bool:
+    return exchange_id in DISCOVERY_SOURCES and since >= time.time() * 1000 - DISCOVERY_RETENTION_MS[exchange_id]
+
+
+def _estimate_trade_counts(
+    exchange, archive: TradeArchive, since: int, until: int, discover_symbols: bool
+) -> tuple[dict[str, int], str]:
+    """估算要扫描的交易对及其窗口内的成交笔数，返回 (交易对 → 笔数, 依据)。"""
+    exchange_id = exchange.id
+    if discover_symbols and archive.covers(exchange_id, since, until):
+        return archive.symbol_trade_counts(exchange_id, since, until), "archive"
+
+    windows = archive.complete_windows(exchange_id)
+    covered_ms = sum(end - start + 1 for start, end in windows)
+    if discover_symbols and _discovery_available(exchange_id, since) and covered_ms:
+        # 按档案里完整窗口的历史成交密度外推：历史上交易过的合约就是预计会被发现的合约。
+        history: dict[str, int] = {}
+        for start, end in windows:
+            for symbol, count in archive.symbol_trade_counts(exchange_id, start, end).items():
+                history[symbol] = history.get(symbol, 0) + count
+        scale = (until - since + 1) / covered_ms
+        return {symbol: round(count * scale) for symbol, count in history.items()}, "archive_history"
+
+    counts = {symbol: 0 for symbol in usdt_contract_symbols(exchange)}
+    counts.update(archive.symbol_trade_counts(exchange_id, since, until))
+    return counts, "all_contracts"
+
+
+def plan_rebuild(
+    exchange_name: str,
+    start_date: str,
+    end_date: str,
+    *,
+    threads: int = 5,
+    discover_symbols: bool = True,
+    archive: TradeArchive = trade_archive,
+    limiter: RateLimiter = rate_limiter,
+) -> dict:
+    """估算一次仓位重建（getPosition）的请求数、权重和耗时，不发出任何账户请求。
+
+    交易对数量和成交密度来自本地成交档案与市场快照，窗口数来自各交易所的成交查询上限，
+    耗时取请求延迟与限频排队两者中较慢的一个，并指出哪个阶段占主导。
+    """
+    exchange_name = exchange_name.lower()
+    if exchange_name not in PLAN_ENDPOINTS:
+        raise ValueError(f"不支持的交易所: {exchange_name}")
+    since, until = _date_to_ms(start_date), _date_to_ms(end_date)
+    if until <= since:
+        raise ValueError("结束日期必须晚于开始日期")
+
+    exchange = create_exchange(exchange_name)
+    load_markets(exchange)
+    metadata = getattr(ccxt, exchange_name)()
+    archive_covered = archive.covers(exchange_name, since, until)
+    trade_counts, symbol_source = _estimate_trade_counts(exchange, archive, since, until, discover_symbols)
+    symbols = len(trade_counts)
+    estimated_trades = sum(trade_counts.values())
+    workers = max(1, min(threads, symbols))
+
+    limits = trade_window_limits(exchange)
+    windows = math.ceil((until - since) / limits.max_window_ms)
+    trade_requests = sum(windows + count // limits.page_limit for count in trade_counts.values())
+
+    discovery_requests = 0
+    if discover_symbols and not archive_covered and _discovery_available(exchange_name, since):
+        rows = estimated_trades * DISCOVERY_ROWS_PER_TRADE[exchange_name]
+        discovery_requests = 1 + rows // DISCOVERY_PAGE_LIMITS[exchange_name]
+
+    # (阶段, 请求数, 并行度)：主线程的时间同步与当前仓位依次执行，每个工作线程各做一次时间同步。
+    phase_requests = [
+        ("connect", 2, 1),
+        ("positions", 1, 1),
+        ("discovery", discovery_requests, 1),
+        ("worker_connect", 2 * workers, workers),
+        ("trades", trade_requests, workers),
+    ]
+    endpoints = PLAN_ENDPOINTS[exchange_name]
+    latency_ms = _request_latency_ms(exchange_name)
+
+    phases = []
+    bucket_weights: dict[str, float] = {}
+    for name, requests, parallel in phase_requests:
+        if not requests:
+            continue
+        bucket, limit, window_ms, weight = _endpoint_weight(metadata, endpoints[name.removeprefix("worker_")])
+        phases.append(
+            {
+                "name": name,
+                "requests": requests,
+                "weight": round(requests * weight, 1),
+                "bucket": bucket,
+                "limit": limit,
+                "window_ms": window_ms,
+                "latency_seconds": requests * latency_ms / 1000 / parallel,
+            }
+        )
+        bucket_weights[bucket] = bucket_weights.get(bucket, 0.0) + requests * weight
+
+    # 同一个桶的限频排队按各阶段的权重占比分摊：桶里现有的余额先用掉，剩下的按补充速率排队。
+    bucket_waits = {}
+    for phase in phases:
+        bucket = phase["bucket"]
+        if bucket not in bucket_waits:
+            available = max(limiter.available(exchange_name, bucket, phase["limit"], phase["window_ms"]), 0.0)
+            rate_per_second = phase["limit"] * limiter.headroom / phase["window_ms"] * 1000
+            bucket_waits[bucket] = (max(bucket_weights[bucket] - available, 0.0) / rate_per_second, rate_per_second)
+    total_seconds = 0.0
+    for phase in phases:
+        wait_seconds, _ = bucket_waits[phase["bucket"]]
+        phase["rate_limit_seconds"] = wait_seconds * phase["weight"] / bucket_weights[phase["bucket"]]
+        phase["seconds"] = max(phase["latency_seconds"], phase["rate_limit_seconds"])
+        phase["bottleneck"] = "rate_limit" if phase["rate_limit_seconds"] > phase["latency_seconds"] else "latency"
+        total_seconds += phase["seconds"]
+    for phase in phases:
+        phase["share"] = round(phase["seconds"] / total_seconds, 3) if total_seconds else 0.0
+        for key in ("latency_seconds", "rate_limit_seconds", "seconds"):
+            phase[key] = round(phase[key], 1)
+        del phase["limit"], phase["window_ms"]
+
+    # 线程数再多也快不过限频：让扫描成交的延迟总时长刚好摊到限频允许的最短时长上。
+    trades_phase = next((phase for phase in phases if phase["name"] == "trades"), None)
+    suggested_threads = workers
+    if trades_phase is not None:
+        _, rate_per_second = bucket_waits[trades_phase["bucket"]]
+        latency_total = trade_requests * latency_ms / 1000
+        rate_floor = max(trades_phase["weight"] / rate_per_second, latency_ms / 1000)
+        suggested_threads = max(1, min(math.ceil(latency_total / rate_floor), symbols, MAX_SUGGESTED_THREADS))
+
+    notes = []
+    if symbol_source == "archive_history":
+        notes.append("交易对和成交笔数按本地档案的历史成交密度外推，实际以发现阶段的结果为准")
+    elif symbol_source == "all_contracts" and discover_symbols and _discovery_available(exchange_name, since):
+        notes.append("本地档案没有可参考的历史，按全部合约估算上限；发现阶段通常会大幅缩小扫描范围")
+    if archive_covered:
+        notes.append("本地成交档案已完整覆盖该窗口，发现阶段不需要请求")
+
+    dominant = max(phases, key=lambda phase: phase["seconds"])["name"] if phases else None
+    return {
+        "exchange": exchange_name,
+        "start_date": start_date,
+        "end_date": end_date,
+        "threads": threads,
+        "symbols": symbols,
+        "symbol_source": symbol_source,
+        "candidate_symbols": len(usdt_contract_symbols(exchange)),
+        "windows_per_symbol": windows,
+        "estimated_trades": estimated_trades,
+        "archive_covered": archive_covered,
+        "request_latency_ms": round(latency_ms, 1),
+        "total_requests": sum(phase["requests"] for phase in phases),
+        "total_weight": {bucket: round(weight, 1) for bucket, weight in bucket_weights.items()},
+        "estimated_seconds": round(total_seconds, 1),
+        "dominant_phase": dominant,
+        "suggested_threads": suggested_threads,
+        "phases": phases,
+        "notes": notes,
+    }
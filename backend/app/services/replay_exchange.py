@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import threading
+import time
+from pathlib import Path
+
+import ccxt
+import numpy as np
+
+from backend.app.services.trade_windows import fetch_my_trades_adaptive
+
+
+DAY_MS = 24 * 60 * 60 * 1000
+REPLAY_SYMBOLS: dict[str, float] = {
+    "BTC/USDT:USDT": 60000.0,
+    "ETH/USDT:USDT": 3000.0,
+    "SOL/USDT:USDT": 150.0,
+    "NXPC/USDT:USDT": 1.2,
+    "DOGE/USDT:USDT": 0.15,
+}
+REPLAY_TRADED_SYMBOLS = ("BTC/USDT:USDT", "NXPC/USDT:USDT")
+# 与真实接口一致的分页语义：单页上限、成交查询的最大时间跨度。
+REPLAY_LIMITS = {
+    "binance": {"ohlcv": 1500, "trades": 1000, "trades_window_ms": 7 * DAY_MS},
+    "okx": {"ohlcv": 100, "trades": 100, "trades_window_ms": 90 * DAY_MS},
+}
+
+
+def _fixture_name(symbol: str) -> str:
+    return symbol.replace("/", "_").replace(":", "_")
+
+
+class ReplayData:
+    """离线行情与成交数据源：优先读取录制的 JSON 夹具，缺失时按种子确定性地合成。
+
+    同一参数下每次生成的K线与成交完全一致，适合做可重复的基准测试。
+    """
+
+    def __init__(
+        self,
+        fixtures_dir: Path | None = None,
+        *,
+        seed: int = 7,
+        listing_ms: int = 1_577_836_800_000,
+        traded_symbols: tuple[str, ...] = REPLAY_TRADED_SYMBOLS,
+        max_trades_per_day: int = 12,
+    ) -> None:
+        self.fixtures_dir = fixtures_dir
+        self.seed = seed
+        self.listing_ms = listing_ms
+        self.traded_symbols = traded_symbols
+        self.max_trades_per_day = max_trades_per_day
+        self._fixtures: dict[str, object] = {}
+
+    def _fixture(self, relative_path: str):
+        if self.fixtures_dir is None:
+            return None
+        if relative_path not in self._fixtures:
+            path = self.fixtures_dir / relative_path
+            self._fixtures[relative_path] = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+        return self._fixtures[relative_path]
+
+    def markets(self) -> dict[str, dict]:
+        recorded = self._fixture("markets.json")
+        if recorded:
+            return recorded
+        markets = {}
+        for symbol in REPLAY_SYMBOLS:
+            base = symbol.split("/")[0]
+            markets[symbol] = {
+                "id": f"{base}USDT",
+                "symbol": symbol,
+                "base": base,
+                "quote": "USDT",
+                "settle": "USDT",
+                "baseId": base,
+                "quoteId": "USDT",
+                "settleId": "USDT",
+                "type": "swap",
+                "spot": False,
+                "margin": False,
+                "swap": True,
+                "future": False,
+                "option": False,
+                "contract": True,
+                "linear": True,
+                "inverse": False,
+                "active": True,
+                "contractSize": 1.0,
+                "precision": {"amount": 0.001, "price": 0.0001},
+                "limits": {"amount": {"min": 0.001, "max": None}, "price": {"min": None, "max": None}},
+                "info": {"symbol": f"{base}USDT", "instType": "SWAP"},
+            }
+        return markets
+
+    def _prices(self, symbol: str, timestamps: np.ndarray) -> np.ndarray:
+        base = REPLAY_SYMBOLS.get(symbol, 100.0)
+        phase = (sum(map(ord, symbol)) + self.seed) % 97
+        hours = timestamps / 3_600_000 + phase
+        return base * (1 + 0.05 * np.sin(hours / 24) + 0.01 * np.sin(hours / 1.7) + 0.002 * np.sin(hours * 7.3))
+
+    def candles(self, symbol: str, timeframe_ms: int, start: int, end: int) -> list[list]:
+        """返回开盘时间落在 ``[start, end]`` 内、且已经开始的全部K线。"""
+        end = min(end, int(time.time() * 1000))
+        start = max(start, self.listing_ms)
+        recorded = self._fixture(f"ohlcv/{_fixture_name(symbol)}_{timeframe_ms}.json")
+        if recorded is not None:
+            return [row for row in recorded if start <= row[0] <= end]
+        first = -(-start // timeframe_ms) * timeframe_ms
+        if first > end:
+            return []
+        opens = np.arange(first, end + 1, timeframe_ms, dtype=np.int64)
+        open_prices = self._prices(symbol, opens)
+        close_prices = self._prices(symbol, opens + timeframe_ms)
+        wick = np.abs(self._prices(symbol, opens + timeframe_ms // 2) - open_prices) * 0.5
+        high = np.maximum(open_prices, close_prices) + wick
+        low = np.minimum(open_prices, close_prices) - wick
+        volume = 100 + (opens // timeframe_ms % 37) * 3.0
+        return np.column_stack([opens, open_prices, high, low, close_prices, volume]).tolist()
+
+    def trades(self, symbol: str, start: int, end: int) -> list[dict]:
+        """返回 ``[start, end]`` 内按 id（也即时间）升序的成交。"""
+        recorded = self._fixture(f"trades/{_fixture_name(symbol)}.json")
+        if recorded is not None:
+            return [trade for trade in recorded if start <= trade["timestamp"] <= end]
+        if symbol not in self.traded_symbols:
+            return []
+
+        end = min(end, int(time.time() * 1000))
+        trades = []
+        for day in range(max(start, self.listing_ms) // DAY_MS, end // DAY_MS + 1):
+            rng = random.Random(f"{self.seed}:{symbol}:{day}")
+            if rng.random() > 0.6:
+                continue
+            count = rng.randint(1, self.max_trades_per_day) * 2
+            offsets = sorted(rng.randrange(DAY_MS) for _ in range(count))
+            amount, open_side = 0.0, "buy"
+            for index, offset in enumerate(offsets):
+                # 成交两两成对：先开仓再等量平仓，重建出的仓位都是完整的一开一平。
+                timestamp = day * DAY_MS + offset
+                if index % 2 == 0:
+                    amount = round(rng.uniform(0.01, 2.0), 3)
+                    open_side = rng.choice(("buy", "sell"))
+                side = open_side if index % 2 == 0 else ("sell" if open_side == "buy" else "buy")
+                if not start <= timestamp <= end:
+                    continue
+                price = float(self._prices(symbol, np.array([timestamp]))[0])
+                trades.append(
+                    {
+                        "id": day * 10_000 + index,
+                        "order_id": day * 10_000 + index // 2,
+                        "timestamp": timestamp,
+                        "symbol": symbol,
+                        "side": side,
+                        "price": round(price, 4),
+                        "amount": amount,
+                        "fee": round(price * amount * 0.0004, 8),
+                    }
+                )
+        return trades
+
+
+class ReplayExchange:
+    """离线的 ccxt 兼容替身，实现本项目用到的接口子集，可配置网络延迟、周期性 429 与真实分页上限。
+
+    通过 ``EXCHANGE_REPLAY=true`` 让 :func:`backend.app.services.exchange.create_exchange` 返回它，
+    图表加载、成交拉取和 getPosition 都能在无网络、无密钥的情况下运行。
+    """
+
+    parse_timeframe = staticmethod(ccxt.Exchange.parse_timeframe)
+    iso8601 = staticmethod(ccxt.Exchange.iso8601)
+
+    def __init__(
+        self,
+        exchange_id: str = "binance",
+        default_type: str = "future",
+        *,
+        data: ReplayData | None = None,
+        latency_ms: float = 0,
+        rate_limit_every: int = 0,
+    ) -> None:
+        self.id = exchange_id
+        self.options = {"defaultType": default_type}
+        self.data = data or ReplayData()
+        self.latency_ms = latency_ms
+        self.rate_limit_every = rate_limit_every
+        self.limits = REPLAY_LIMITS.get(exchange_id, REPLAY_LIMITS["binance"])
+        self.markets: dict | None = None
+        self.markets_by_id: dict = {}
+        self.currencies: dict = {}
+        self.apiKey = "replay"
+        self.secret = "replay"
+        self.rateLimit = 50
+        self.calls: dict[str, int] = {}
+        self._calls_lock = threading.Lock()
+
+    def _count(self, endpoint: str) -> None:
+        with self._calls_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+            total = sum(self.calls.values())
+        if self.rate_limit_every and total % self.rate_limit_every == 0:
+            raise ccxt.RateLimitExceeded(f"{self.id} 429 Too Many Requests (replay)")
+
+    def _hit(self, endpoint: str) -> None:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        self._count(endpoint)
+
+    def set_markets(self, markets, currencies=None) -> dict:
+        self.markets = dict(markets)
+        self.markets_by_id = {market["id"]: market for market in self.markets.values()}
+        self.currencies = currencies or {}
+        return self.markets
+
+    def load_markets(self, reload: bool = False, params=None) -> dict:
+        if self.markets is None or reload:
+            self._hit("markets")
+            self.set_markets(self.data.markets())
+        return self.markets
+
+    def market(self, symbol: str) -> dict:
+        if self.markets is None or symbol not in self.markets:
+            raise ccxt.BadSymbol(f"{self.id} does not have market symbol {symbol}")
+        return self.markets[symbol]
+
+    def fetch_time(self, params=None) -> int:
+        self._hit("time")
+        return int(time.time() * 1000)
+
+    def load_time_difference(self, params=None) -> int:
+        self.options["timeDifference"] = int(time.time() * 1000) - self.fetch_time()
+        return self.options["timeDifference"]
+
+    def serve_ohlcv(self, symbol: str, timeframe: str, since, limit, params) -> list[list]:
+        self.market(symbol)
+        params = params or {}
+        timeframe_ms = self.parse_timeframe(timeframe) * 1000
+        limit = min(limit or 500, self.limits["ohlcv"])
+        since = since if since is not None else params.get("startTime")
+        until = params.get("until", params.get("endTime"))
+        now = int(time.time() * 1000)
+        if since is None:
+            end = until if until is not None else now
+            return self.data.candles(symbol, timeframe_ms, end - timeframe_ms * limit + 1, end)[-limit:]
+        end = until if until is not None else since + timeframe_ms * limit - 1
+        return self.data.candles(symbol, timeframe_ms, since, end)[:limit]
+
+    def serve_my_trades(self, symbol: str, since, limit, params) -> list[dict]:
+        self.market(symbol)
+        params = params or {}
+        if self.id == "okx":
+            start = int(params.get("begin", since or 0))
+            end = int(params.get("end", params.get("until", time.time() * 1000)))
+            before_id = int(params["after"]) if params.get("after") else None
+            limit = min(int(params.get("limit", limit or 100)), self.limits["trades"])
+            rows = [trade for trade in self.data.trades(symbol, start, end) if before_id is None or trade["id"] < before_id]
+            return [self._unified_trade(trade) for trade in reversed(rows[-limit:])]
+
+        end = params.get("endTime", params.get("until"))
+        start = params.get("startTime", since)
+        if start is None and end is None:
+            end = int(time.time() * 1000)
+        if start is None:
+            start = end - self.limits["trades_window_ms"]
+        if end is None:
+            end = start + self.limits["trades_window_ms"]
+        if end - start > self.limits["trades_window_ms"]:
+            raise ccxt.BadRequest(f"{self.id} startTime and endTime must be within 7 days (replay)")
+        limit = min(int(params.get("limit", limit or 500)), self.limits["trades"])
+        from_id = params.get("fromId")
+        rows = [trade for trade in self.data.trades(symbol, start, end) if from_id is None or trade["id"] >= int(from_id)]
+        return [self._unified_trade(trade) for trade in rows[:limit]]
+
+    def _account_trades(self, start: int, end: int) -> list[tuple[int, dict]]:
+        """账户在所有合约上的成交，按时间升序；流水 ID 由时间戳和合约序号拼成，跨合约唯一。"""
+        symbols = list(self.markets or self.data.markets())
+        rows = [
+            (trade["timestamp"] * 100 + index, trade)
+            for index, symbol in enumerate(symbols)
+            for trade in self.data.trades(symbol, start, end)
+        ]
+        return sorted(rows, key=lambda row: row[0])
+
+    def serve_income(self, params) -> list[dict]:
+        """币安 ``/fapi/v1/income``：每笔成交对应一条手续费流水，时间升序。"""
+        params = params or {}
+        end = int(params.get("endTime", time.time() * 1000))
+        start = int(params.get("startTime", end - 7 * DAY_MS))
+        limit = min(int(params.get("limit", 100)), 1000)
+        return [
+            {
+                "symbol": self.market(trade["symbol"])["id"],
+                "incomeType": "COMMISSION",
+                "income": f"{-trade['fee']}",
+                "asset": "USDT",
+                "info": "",
+                "time": trade["timestamp"],
+                "tranId": bill_id,
+                "tradeId": str(trade["id"]),
+            }
+            for bill_id, trade in self._account_trades(start, end)[:limit]
+        ]
+
+    def serve_fills_history(self, params) -> dict:
+        """OKX ``/api/v5/trade/fills-history``：按 billId 倒序，``after`` 取更早的一页。"""
+        params = params or {}
+        end = int(params.get("end", time.time() * 1000))
+        start = int(params.get("begin", end - 90 * DAY_MS))
+        after = int(params["after"]) if params.get("after") else None
+        limit = min(int(params.get("limit", 100)), 100)
+        rows = [row for row in self._account_trades(start, end) if after is None or row[0] < after]
+        return {
+            "code": "0",
+            "msg": "",
+            "data": [
+                {
+                    "instType": "SWAP",
+                    "instId": self.market(trade["symbol"])["id"],
+                    "tradeId": str(trade["id"]),
+                    "billId": str(bill_id),
+                    "side": trade["side"],
+                    "fillPx": str(trade["price"]),
+                    "fillSz": str(trade["amount"]),
+                    "fee": f"{-trade['fee']}",
+                    "ts": str(trade["timestamp"]),
+                }
+                for bill_id, trade in reversed(rows[-limit:])
+            ],
+        }
+
+    def _unified_trade(self, trade: dict) -> dict:
+        cost = trade["price"] * trade["amount"]
+        fee = {"cost": trade["fee"], "currency": "USDT"}
+        return {
+            "id": str(trade["id"]),
+            "order": str(trade["order_id"]),
+            "timestamp": trade["timestamp"],
+            "datetime": self.iso8601(trade["timestamp"]),
+            "symbol": trade["symbol"],
+            "type": None,
+            "side": trade["side"],
+            "takerOrMaker": "taker",
+            "price": trade["price"],
+            "amount": trade["amount"],
+            "cost": cost,
+            "fee": fee,
+            "fees": [fee],
+            "info": {"id": trade["id"], "time": trade["timestamp"], "realizedPnl": "0"},
+        }
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since=None, limit=None, params=None) -> list[list]:
+        self._hit("ohlcv")
+        return self.serve_ohlcv(symbol, timeframe, since, limit, params)
+
+    def fetch_my_trades(self, symbol: str | None = None, since=None, limit=None, params=None) -> list[dict]:
+        self._hit("my_trades")
+        return self.serve_my_trades(symbol, since, limit, params)
+
+    def fapiPrivateGetIncome(self, params=None) -> list[dict]:
+        self._hit("income")
+        return self.serve_income(params)
+
+    def privateGetTradeFillsHistory(self, params=None) -> dict:
+        self._hit("fills_history")
+        return self.serve_fills_history(params)
+
+    def fetch_orders(self, symbol: str | None = None, since=None, limit=None, params=None) -> list[dict]:
+        self._hit("orders")
+        return []
+
+    def fetch_positions(self, symbols=None, params=None) -> list[dict]:
+        self._hit("positions")
+        return []
+
+    def close(self) -> None:
+        return None
+
+
+class AsyncReplayExchange(ReplayExchange):
+    """:class:`ReplayExchange` 的 ``ccxt.async_support`` 形态，延迟用 ``asyncio.sleep`` 模拟。"""
+
+    async def _hit_async(self, endpoint: str) -> None:
+        if self.latency_ms:
+            await asyncio.sleep(self.latency_ms / 1000)
+        self._count(endpoint)
+
+    async def load_markets(self, reload: bool = False, params=None) -> dict:
+        if self.markets is None or reload:
+            await self._hit_async("markets")
+            self.set_markets(self.data.markets())
+        return self.markets
+
+    async def fetch_time(self, params=None) -> int:
+        await self._hit_async("time")
+        return int(time.time() * 1000)
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "1m", since=None, limit=None, params=None) -> list[list]:
+        await self._hit_async("ohlcv")
+        return self.serve_ohlcv(symbol, timeframe, since, limit, params)
+
+    async def fetch_my_trades(self, symbol: str | None = None, since=None, limit=None, params=None) -> list[dict]:
+        await self._hit_async("my_trades")
+        return self.serve_my_trades(symbol, since, limit, params)
+
+    async def close(self) -> None:
+        return None
+
+
+def record_fixtures(
+    exchange,
+    fixtures_dir: Path,
+    symbols: list[str],
+    timeframes: list[str],
+    since: int,
+    until: int,
+    *,
+    with_trades: bool = False,
+) -> None:
+    """用真实的同步 ccxt 客户端录制夹具，之后 :class:`ReplayData` 会优先回放这些数据。"""
+    fixtures_dir.mkdir(parents=True, exist_ok=True)
+    markets = exchange.load_markets()
+    (fixtures_dir / "markets.json").write_text(
+        json.dumps({symbol: markets[symbol] for symbol in symbols if symbol in markets}, default=str),
+        encoding="utf-8",
+    )
+    for symbol in symbols:
+        for timeframe in timeframes:
+            timeframe_ms = exchange.parse_timeframe(timeframe) * 1000
+            rows, cursor = [], since
+            while cursor <= until:
+                batch = [row for row in exchange.fetch_ohlcv(symbol, timeframe, since=cursor, limit=1000) if row[0] <= until]
+                if not batch:
+                    break
+                rows.extend(batch)
+                cursor = batch[-1][0] + timeframe_ms
+            path = fixtures_dir / "ohlcv" / f"{_fixture_name(symbol)}_{timeframe_ms}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(rows), encoding="utf-8")
+
+        if with_trades:
+            # 与重建仓位一样按成交密度切分窗口，满页时接着查剩余时间段，夹具里的成交才是完整的。
+            trades = [
+                {
+                    "id": int(trade["id"]),
+                    "order_id": int(trade.get("order") or 0),
+                    "timestamp": trade["timestamp"],
+                    "symbol": symbol,
+                    "side": trade["side"],
+                    "price": trade["price"],
+                    "amount": trade["amount"],
+                    "fee": (trade.get("fee") or {}).get("cost") or 0,
+                }
+                for trade in fetch_my_trades_adaptive(exchange, symbol, since, until)
+            ]
+            path = fixtures_dir / "trades" / f"{_fixture_name(symbol)}.json"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(trades), encoding="utf-8")
+
+
+def create_replay_exchange(exchange_name: str, default_type: str, *, asynchronous: bool = False, **kwargs):
+    exchange_class = AsyncReplayExchange if asynchronous else ReplayExchange
+    return exchange_class(exchange_name.lower(), default_type, **kwargs)
+
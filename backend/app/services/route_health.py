@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+import ccxt
+
+from backend.app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+LATENCY_SMOOTHING = 0.3
+# ccxt 把限频和 nonce/校验错误也归在 NetworkError 下，但它们说明路由是通的，不算路由失败；
+# 两条路由共用同一份交易所额度，限频时换路由重试只会更糟。
+NON_ROUTE_ERRORS = (ccxt.RateLimitExceeded, ccxt.DDoSProtection, ccxt.InvalidNonce)
+
+
+def route_name(use_proxy: bool) -> str:
+    return "proxy" if use_proxy else "direct"
+
+
+class RouteHealth:
+    """记录每个交易所在代理/直连两条网络路由上的成败与延迟。
+
+    请求固定走最近一次成功的路由，失败时才切到另一条；另一条路由由后台线程定期探测，
+    切换时优先选择探测结果健康的路由，不必每次都先等代理超时。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict[str, dict]] = {}
+        self._preferred: dict[str, bool] = {}
+        self._probe_thread: threading.Thread | None = None
+
+    @staticmethod
+    def _new_state() -> dict:
+        return {
+            "healthy": None,
+            "latency_ms": None,
+            "successes": 0,
+            "failures": 0,
+            "last_success_at": None,
+            "last_failure_at": None,
+            "last_error": None,
+        }
+
+    def _state(self, exchange_name: str, use_proxy: bool) -> dict:
+        routes = self._routes.setdefault(exchange_name, {})
+        return routes.setdefault(route_name(use_proxy), self._new_state())
+
+    def route_order(self, exchange_name: str) -> list[bool]:
+        """返回本次请求依次尝试的路由（``use_proxy`` 取值），未配置代理时只有直连。"""
+        if not settings.exchange_proxy_url:
+            return [False]
+        self._start_probe_thread()
+        exchange_name = exchange_name.lower()
+        with self._lock:
+            preferred = self._preferred.get(exchange_name, True)
+            other_state = self._state(exchange_name, not preferred)
+            preferred_state = self._state(exchange_name, preferred)
+            if preferred_state["healthy"] is False and other_state["healthy"]:
+                preferred = not preferred
+        return [preferred, not preferred]
+
+    def record_success(self, exchange_name: str, use_proxy: bool, latency_ms: float, *, probe: bool = False) -> None:
+        exchange_name = exchange_name.lower()
+        with self._lock:
+            state = self._state(exchange_name, use_proxy)
+            state["healthy"] = True
+            state["successes"] += 1
+            state["last_success_at"] = time.time()
+            previous = state["latency_ms"]
+            state["latency_ms"] = round(
+                latency_ms if previous is None else previous + LATENCY_SMOOTHING * (latency_ms - previous), 1
+            )
+            if not probe:
+                self._preferred[exchange_name] = use_proxy
+
+    def record_failure(self, exchange_name: str, use_proxy: bool, error: Exception) -> None:
+        with self._lock:
+            state = self._state(exchange_name.lower(), use_proxy)
+            state["healthy"] = False
+            state["failures"] += 1
+            state["last_failure_at"] = time.time()
+            state["last_error"] = str(error)[:200]
+
+    def _probe(self, exchange_name: str, use_proxy: bool) -> None:
+        from backend.app.services.exchange import get_exchange
+
+        started = time.perf_counter()
+        try:
+            get_exchange(exchange_name, require_auth=False, use_proxy=use_proxy).fetch_time()
+        except NON_ROUTE_ERRORS:
+            return
+        except Exception as exc:
+            self.record_failure(exchange_name, use_proxy, exc)
+            return
+        with self._lock:
+            recovered = self._state(exchange_name, use_proxy)["healthy"] is False
+        if recovered:
+            logger.info("%s %s 路由已恢复", exchange_name.upper(), route_name(use_proxy))
+        self.record_success(exchange_name, use_proxy, (time.perf_counter() - started) * 1000, probe=True)
+
+    def _probe_loop(self) -> None:
+        while True:
+            time.sleep(settings.route_probe_seconds)
+            with self._lock:
+                targets = [(name, not self._preferred.get(name, True)) for name in self._routes]
+            for exchange_name, use_proxy in targets:
+                self._probe(exchange_name, use_proxy)
+
+    def _start_probe_thread(self) -> None:
+        with self._lock:
+            if self._probe_thread is None:
+                self._probe_thread = threading.Thread(target=self._probe_loop, name="route-probe", daemon=True)
+                self._probe_thread.start()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                exchange_name: {
+                    "preferred": route_name(self._preferred.get(exchange_name, True)),
+                    "routes": {name: dict(state) for name, state in routes.items()},
+                }
+                for exchange_name, routes in self._routes.items()
+            }
+
+
+route_health = RouteHealth()
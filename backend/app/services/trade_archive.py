@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from backend.app.core.config import settings
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    exchange TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    trade_id TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (exchange, symbol, trade_id)
+);
+CREATE INDEX IF NOT EXISTS trades_time ON trades (exchange, timestamp);
+CREATE TABLE IF NOT EXISTS complete_windows (
+    exchange TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    recorded_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS complete_windows_exchange ON complete_windows (exchange, start_ts);
+"""
+
+
+class TradeArchive:
+    """本地成交档案（SQLite）：保存扫描到的账户成交，并记录哪些时间窗口已经完整扫描过。
+
+    完整窗口内的成交交易对可以直接从档案得出，重建仓位历史时不必再向交易所确认。
+    与缓存索引一样使用 WAL 模式，每个线程持有自己的连接。
+    """
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def save_trades(self, exchange: str, symbol: str, trades: list[dict]) -> None:
+        """按成交 ID 去重写入；原始 ``info`` 体积大且重建仓位用不到，不入档。"""
+        rows = [
+            (
+                exchange,
+                symbol,
+                str(trade["id"]),
+                int(trade["timestamp"]),
+                json.dumps({key: value for key, value in trade.items() if key != "info"}, default=str),
+            )
+            for trade in trades
+            if trade.get("id") is not None and trade.get("timestamp") is not None
+        ]
+        if rows:
+            self._connection().executemany(
+                "INSERT OR REPLACE INTO trades (exchange, symbol, trade_id, timestamp, payload) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def load_trades(self, exchange: str, symbol: str, start: int, end: int) -> list[dict]:
+        rows = self._connection().execute(
+            "SELECT payload FROM trades WHERE exchange = ? AND symbol = ? AND timestamp BETWEEN ? AND ? "
+            "ORDER BY timestamp",
+            (exchange, symbol, start, end),
+        ).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def traded_symbols(self, exchange: str, start: int, end: int) -> set[str]:
+        rows = self._connection().execute(
+            "SELECT DISTINCT symbol FROM trades WHERE exchange = ? AND timestamp BETWEEN ? AND ?",
+            (exchange, start, end),
+        ).fetchall()
+        return {symbol for (symbol,) in rows}
+
+    def symbol_trade_counts(self, exchange: str, start: int, end: int) -> dict[str, int]:
+        rows = self._connection().execute(
+            "SELECT symbol, COUNT(*) FROM trades WHERE exchange = ? AND timestamp BETWEEN ? AND ? GROUP BY symbol",
+            (exchange, start, end),
+        ).fetchall()
+        return {symbol: count for symbol, count in rows}
+
+    def complete_windows(self, exchange: str) -> list[tuple[int, int]]:
+        """合并后的完整窗口列表，按开始时间升序。"""
+        rows = self._connection().execute(
+            "SELECT start_ts, end_ts FROM complete_windows WHERE exchange = ? ORDER BY start_ts",
+            (exchange,),
+        ).fetchall()
+        merged: list[tuple[int, int]] = []
+        for start, end in rows:
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def record_complete_window(self, exchange: str, start: int, end: int) -> None:
+        """登记 ``[start, end]`` 内该交易所账户的全部成交都已入档。"""
+        if end >= start:
+            self._connection().execute(
+                "INSERT INTO complete_windows (exchange, start_ts, end_ts, recorded_at) VALUES (?, ?, ?, ?)",
+                (exchange, start, end, int(time.time() * 1000)),
+            )
+
+    def covers(self, exchange: str, start: int, end: int) -> bool:
+        """已登记的完整窗口合并后能否无缝覆盖 ``[start, end]``。"""
+        rows = self._connection().execute(
+            "SELECT start_ts, end_ts FROM complete_windows WHERE exchange = ? AND end_ts >= ? AND start_ts <= ? "
+            "ORDER BY start_ts",
+            (exchange, start, end),
+        ).fetchall()
+        cursor = start
+        for window_start, window_end in rows:
+            if window_start > cursor:
+                return False
+            cursor = max(cursor, window_end + 1)
+            if cursor > end:
+                return True
+        return False
+
+
+trade_archive = TradeArchive(settings.trade_archive_file)
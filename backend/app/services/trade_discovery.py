@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import logging
+import time
+
+import ccxt
+
+from backend.app.services.trade_archive import TradeArchive, trade_archive
+
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+# 账户流水接口可回溯的时长：币安 income 与 OKX fills-history 都只保留最近 3 个月。
+DISCOVERY_RETENTION_MS = {"binance": 90 * DAY_MS, "okx": 90 * DAY_MS}
+BINANCE_INCOME_PAGE_LIMIT = 1000
+OKX_FILLS_PAGE_LIMIT = 100
+MAX_ATTEMPTS = 3
+
+
+def _contract_symbol(exchange, market_id: str) -> str | None:
+    """把接口返回的合约 ID 映射回统一符号；同一 ID 对应多个市场时取线性合约。"""
+    markets = exchange.markets_by_id.get(market_id)
+    if not markets:
+        return None
+    if isinstance(markets, dict):
+        return markets["symbol"]
+    for market in markets:
+        if market.get("contract") and market.get("linear"):
+            return market["symbol"]
+    return markets[0]["symbol"]
+
+
+def _request(call, params: dict):
+    """限频与网络错误重试几次；限频器已按 Retry-After 暂停请求，重试时会自动等到放行。"""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            return call(params)
+        except (ccxt.RateLimitExceeded, ccxt.DDoSProtection, ccxt.NetworkError):
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(attempt * 0.5)
+
+
+def _binance_income_ids(exchange, since: int, until: int) -> set[str]:
+    """币安合约资金流水：每笔成交都会产生手续费流水，平仓还有已实现盈亏，时间升序分页。"""
+    market_ids: set[str] = set()
+    cursor = since
+    while cursor <= until:
+        rows = _request(
+            exchange.fapiPrivateGetIncome,
+            {"startTime": cursor, "endTime": until, "limit": BINANCE_INCOME_PAGE_LIMIT},
+        )
+        market_ids.update(row["symbol"] for row in rows if row.get("symbol"))
+        if len(rows) < BINANCE_INCOME_PAGE_LIMIT:
+            break
+        last_time = int(rows[-1]["time"])
+        cursor = last_time if last_time > cursor else cursor + 1
+    return market_ids
+
+
+def _okx_fill_ids(exchange, since: int, until: int) -> set[str]:
+    """OKX 永续合约成交明细（近 3 个月），按 billId 倒序，用 ``after`` 翻到更早的一页。"""
+    market_ids: set[str] = set()
+    after = None
+    while True:
+        params = {"instType": "SWAP", "begin": str(since), "end": str(until), "limit": str(OKX_FILLS_PAGE_LIMIT)}
+        if after:
+            params["after"] = after
+        rows = _request(exchange.privateGetTradeFillsHistory, params).get("data", [])
+        market_ids.update(row["instId"] for row in rows if row.get("instId"))
+        if len(rows) < OKX_FILLS_PAGE_LIMIT:
+            break
+        after = rows[-1]["billId"]
+    return market_ids
+
+
+DISCOVERY_SOURCES = {
+    "binance": _binance_income_ids,
+    "okx": _okx_fill_ids,
+}
+
+
+def usdt_contract_symbols(exchange) -> list[str]:
+    """逐个扫描成交时的候选：活跃的 USDT 结算合约（OKX 为永续，其余为以 ``:USDT`` 结尾的合约）。"""
+    symbols = []
+    for symbol, market in exchange.markets.items():
+        if not market.get("active", True):
+            continue
+        if exchange.id == "okx":
+            is_swap = market.get("type") == "swap" or market.get("info", {}).get("instType") == "SWAP"
+            if is_swap and market.get("settle") == "USDT":
+                symbols.append(symbol)
+        elif market.get("type") in ("future", "swap") and symbol.endswith(":USDT"):
+            symbols.append(symbol)
+    return symbols
+
+
+def discover_traded_symbols(exchange, since: int, until: int, *, archive: TradeArchive = trade_archive) -> set[str] | None:
+    """找出 ``[since, until]`` 内账户有成交的合约，供逐个交易对扫描成交前缩小范围。
+
+    本地成交档案完整覆盖该窗口时直接用档案；否则查询账户流水接口，并与档案里的交易对取并集。
+    交易所不支持、窗口超出流水保留期或接口出错时返回 ``None``，调用方应退回全量枚举。
+    """
+    exchange_id = exchange.id
+    if archive.covers(exchange_id, since, until):
+        symbols = archive.traded_symbols(exchange_id, since, until)
+        logger.info("%s 本地成交档案已覆盖该窗口，发现 %s 个有成交的交易对", exchange_id.upper(), len(symbols))
+        return symbols
+
+    source = DISCOVERY_SOURCES.get(exchange_id)
+    if source is None:
+        return None
+    if since < time.time() * 1000 - DISCOVERY_RETENTION_MS[exchange_id]:
+        logger.info("%s 窗口早于账户流水保留期，无法确定成交交易对", exchange_id.upper())
+        return None
+
+    try:
+        market_ids = source(exchange, since, until)
+    except ccxt.BaseError as exc:
+        logger.warning("%s 查询账户流水失败，无法确定成交交易对: %s", exchange_id.upper(), exc)
+        return None
+
+    symbols = {symbol for symbol in (_contract_symbol(exchange, market_id) for market_id in market_ids) if symbol}
+    unknown = len(market_ids) - len(symbols)
+    if unknown:
+        logger.warning("%s 有 %s 个流水中的合约不在市场列表里，已忽略", exchange_id.upper(), unknown)
+    symbols |= archive.traded_symbols(exchange_id, since, until)
+    logger.info("%s 账户流水发现 %s 个有成交的交易对", exchange_id.upper(), len(symbols))
+    return symbols
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import ccxt
+
+
+logger = logging.getLogger(__name__)
+
+DAY_MS = 24 * 60 * 60 * 1000
+# 限频错误的退避上限：持续封禁时不至于无限等待。
+MAX_RATE_LIMIT_BACKOFF_SECONDS = 30
+
+
+@dataclass(frozen=True)
+class TradeWindowLimits:
+    max_window_ms: int
+    page_limit: int
+    newest_first: bool
+
+
+# 币安 userTrades：startTime 与 endTime 相差不能超过 7 天，单页 1000 条，时间升序。
+# OKX fills-history：可查近 3 个月，单页 100 条，返回窗口内最新的一页。
+TRADE_WINDOW_LIMITS = {
+    "binance": TradeWindowLimits(7 * DAY_MS - 1, 1000, False),
+    "okx": TradeWindowLimits(90 * DAY_MS, 100, True),
+}
+DEFAULT_TRADE_WINDOW_LIMITS = TradeWindowLimits(7 * DAY_MS - 1, 100, False)
+
+
+def trade_window_limits(exchange) -> TradeWindowLimits:
+    return TRADE_WINDOW_LIMITS.get(exchange.id, DEFAULT_TRADE_WINDOW_LIMITS)
+
+
+def _trade_key(trade: dict):
+    if trade.get("id") is not None:
+        return str(trade["id"])
+    return (trade.get("timestamp"), trade.get("side"), trade.get("price"), trade.get("amount"))
+
+
+class AdaptiveTradeFetcher:
+    """按成交密度切分时间窗口拉取账户成交，请求次数随成交多少而不是日历天数增长。
+
+    先按交易所允许的最宽窗口覆盖整个区间，空窗口只花一次请求；返回满页说明窗口里还有成交，
+    已返回的部分是完整的，只把剩下的时间段拆出来接着查，直到每段都不满一页。
+    限频错误在共享限频器放行的基础上按指数退避重试 ``max_rate_limit_retries`` 次，
+    其余错误重试 ``max_retries`` 次，超过次数后都会抛出。
+    """
+
+    def __init__(
+        self,
+        exchange,
+        *,
+        max_retries: int = 3,
+        max_rate_limit_retries: int = 5,
+        should_stop: Callable[[], bool] | None = None,
+    ) -> None:
+        self.exchange = exchange
+        self.limits = trade_window_limits(exchange)
+        self.max_retries = max_retries
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.should_stop = should_stop or (lambda: False)
+        self.requests = 0
+
+    def _fetch_window(self, symbol: str, start: int, end: int) -> list[dict]:
+        attempt = rate_limited = 0
+        while True:
+            try:
+                self.requests += 1
+                return self.exchange.fetch_my_trades(
+                    symbol, since=start, limit=self.limits.page_limit, params={"until": end}
+                )
+            except (ccxt.RateLimitExceeded, ccxt.DDoSProtection) as exc:
+                rate_limited += 1
+                if rate_limited > self.max_rate_limit_retries:
+                    raise
+                backoff = min(2 ** (rate_limited - 1), MAX_RATE_LIMIT_BACKOFF_SECONDS)
+                logger.warning("%s 拉取成交触发限频，%ss 后重试 %s/%s: %s", symbol, backoff, rate_limited, self.max_rate_limit_retries, exc)
+                time.sleep(backoff)
+            except Exception as exc:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                logger.warning("%s 拉取成交出错，重试 %s/%s: %s", symbol, attempt, self.max_retries, exc)
+                time.sleep(attempt * 0.5)
+
+    def _remainder(self, start: int, end: int, batch: list[dict]) -> tuple[int, int] | None:
+        """满页时窗口里尚未返回的时间段：升序接口在最后一条之后，倒序接口在最早一条之前。
+
+        边界上的毫秒保留在剩余时间段里重查，同一毫秒的成交靠成交 ID 去重。
+        """
+        if self.limits.newest_first:
+            boundary = batch[0]["timestamp"]
+            start, end = start, boundary if boundary < end else end - 1
+        else:
+            boundary = batch[-1]["timestamp"]
+            start, end = boundary if boundary > start else start + 1, end
+        return (start, end) if start <= end else None
+
+    def fetch(self, symbol: str, since: int, until: int) -> list[dict]:
+        """拉取 ``[since, until]`` 内的全部成交，按时间升序、按成交 ID 去重返回。"""
+        trades: dict = {}
+        width = self.limits.max_window_ms
+        pending = deque((start, min(start + width - 1, until)) for start in range(since, until + 1, width))
+        while pending and not self.should_stop():
+            start, end = pending.popleft()
+            batch = sorted(self._fetch_window(symbol, start, end), key=lambda trade: trade["timestamp"])
+            trades.update((_trade_key(trade), trade) for trade in batch)
+            if len(batch) >= self.limits.page_limit:
+                remainder = self._remainder(start, end, batch)
+                if remainder is not None:
+                    pending.appendleft(remainder)
+        return sorted(trades.values(), key=lambda trade: trade["timestamp"])
+
+
+def fetch_my_trades_adaptive(exchange, symbol: str, since: int, until: int, **kwargs) -> list[dict]:
+    return AdaptiveTradeFetcher(exchange, **kwargs).fetch(symbol, since, until)
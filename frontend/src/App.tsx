@@ -6,6 +6,7 @@ import type {
   ChartPayload,
   ChartResponse,
   IndicatorKey,
+  IndicatorName,
   IndicatorSettings,
   IndicatorState,
   PositionRecord,
@@ -17,12 +18,21 @@ import { PositionNavigator } from './features/positions/PositionNavigator'
 
 const DEFAULT_INDICATORS: IndicatorState = {
   showEma: true,
+  showBollinger: false,
   showVolume: true,
   showRsi: false,
   showMacd: false,
   showTradeMarkers: true,
 }
 
+// 开关对应的后端指标；只请求正在显示的指标，成交量与交易标记不需要后端计算。
+const INDICATOR_NAMES: Partial<Record<IndicatorKey, IndicatorName>> = {
+  showEma: 'ema',
+  showBollinger: 'bollinger',
+  showRsi: 'rsi',
+  showMacd: 'macd',
+}
+
 const DEFAULT_INDICATOR_SETTINGS: IndicatorSettings = {
   ema: { periods: [20, 50, 200] },
   rsi: { period: 14 },
@@ -211,21 +221,24 @@ function App() {
       end_date: endDate,
       data_file: dataFile,
       exchange,
-      indicator_settings: indicatorSettings,
+      indicator_settings: { ...indicatorSettings, enabled: enabledIndicatorNames(indicators) },
     })
   }
 
   function handleLoadMore() {
     const lastTimestamp = chartResult?.chart.candlestick.at(-1)?.time
-    if (!lastTimestamp) {
+    if (!chartResult || !lastTimestamp) {
       return
     }
     loadMoreMutation.mutate({
       symbol,
       timeframe,
       last_timestamp: lastTimestamp,
+      first_timestamp: chartResult.chart.candlestick[0]?.time,
       candles_to_load: 500,
       exchange,
+      // 沿用当前图表计算时的指标参数，新K线的指标才能与已有的接上。
+      indicator_settings: chartResult.indicator_settings,
     })
   }
 
@@ -268,6 +281,12 @@ function App() {
   }
 
   function handleIndicatorToggle(key: IndicatorKey) {
+    const name = INDICATOR_NAMES[key]
+    const loadedNames = chartResult?.indicator_settings.enabled ?? []
+    if (name && !indicators[key] && chartResult && !loadedNames.includes(name)) {
+      // 当前图表没有计算这个指标，打开时重新加载一次。
+      setHasAutoLoaded(false)
+    }
     setIndicators((current) => ({
       ...current,
       [key]: !current[key],
@@ -350,19 +369,44 @@ function shiftDate(value: string, offsetDays: number) {
   return date.toISOString().slice(0, 10)
 }
 
+function enabledIndicatorNames(indicators: IndicatorState): IndicatorName[] {
+  return (Object.keys(INDICATOR_NAMES) as IndicatorKey[])
+    .filter((key) => indicators[key])
+    .map((key) => INDICATOR_NAMES[key] as IndicatorName)
+}
+
+const PERIOD_SERIES_KEYS = ['ema_series', 'sma_series'] as const
+const VALUE_SERIES_KEYS = [
+  'rsi',
+  'macd',
+  'signal',
+  'histogram',
+  'bollinger_upper',
+  'bollinger_middle',
+  'bollinger_lower',
+  'atr',
+  'vwap',
+] as const
+
 function mergeChartPayload(current: ChartPayload, incoming: ChartPayload): ChartPayload {
-  return {
+  const merged: ChartPayload = {
+    ...current,
     candlestick: appendSeriesByTime(current.candlestick, incoming.candlestick),
     volume: appendSeriesByTime(current.volume, incoming.volume),
-    ema_series: current.ema_series.map((series, index) => ({
+  }
+  for (const key of PERIOD_SERIES_KEYS) {
+    merged[key] = current[key]?.map((series, index) => ({
       ...series,
-      data: appendSeriesByTime(series.data, incoming.ema_series[index]?.data ?? []),
-    })),
-    rsi: appendSeriesByTime(current.rsi, incoming.rsi),
-    macd: appendSeriesByTime(current.macd, incoming.macd),
-    signal: appendSeriesByTime(current.signal, incoming.signal),
-    histogram: appendSeriesByTime(current.histogram, incoming.histogram),
+      data: appendSeriesByTime(series.data, incoming[key]?.[index]?.data ?? []),
+    }))
   }
+  for (const key of VALUE_SERIES_KEYS) {
+    const series = current[key]
+    if (series) {
+      merged[key] = appendSeriesByTime(series, incoming[key] ?? [])
+    }
+  }
+  return merged
 }
 
 function appendSeriesByTime<T extends { time: number }>(current: T[], incoming: T[]): T[] {
@@ -226,11 +226,12 @@ export function TradingChart({
   const chartSeriesIndicators = useMemo(
     () => ({
       showEma: indicators.showEma,
+      showBollinger: indicators.showBollinger,
       showVolume: indicators.showVolume,
       showRsi: indicators.showRsi,
       showMacd: indicators.showMacd,
     }),
-    [indicators.showEma, indicators.showMacd, indicators.showRsi, indicators.showVolume],
+    [indicators.showBollinger, indicators.showEma, indicators.showMacd, indicators.showRsi, indicators.showVolume],
   )
   const chartRenderIndicators = useMemo<IndicatorState>(
     () => ({
@@ -243,6 +244,7 @@ export function TradingChart({
     () =>
       [
         chartSeriesIndicators.showEma,
+        chartSeriesIndicators.showBollinger,
         chartSeriesIndicators.showVolume,
         chartSeriesIndicators.showRsi,
         chartSeriesIndicators.showMacd,
@@ -478,6 +480,29 @@ export function TradingChart({
       })
     }
 
+    if (chartSeriesIndicators.showBollinger) {
+      const bands = [
+        { data: chartData.bollinger_upper, color: 'rgba(56, 189, 248, 0.8)', lineStyle: LineStyle.Solid },
+        { data: chartData.bollinger_middle, color: 'rgba(148, 163, 184, 0.7)', lineStyle: LineStyle.Dashed },
+        { data: chartData.bollinger_lower, color: 'rgba(56, 189, 248, 0.8)', lineStyle: LineStyle.Solid },
+      ]
+      bands.forEach((band) => {
+        const bandSeries = chart.addSeries(
+          LineSeries,
+          {
+            color: band.color,
+            lineWidth: 1,
+            lineStyle: band.lineStyle,
+            priceLineVisible: false,
+            lastValueVisible: false,
+            crosshairMarkerVisible: false,
+          },
+          0,
+        )
+        bandSeries.setData(toLineSeriesData(band.data ?? []))
+      })
+    }
+
     let paneIndex = 1
     if (chartSeriesIndicators.showVolume) {
       const volumeSeries = chart.addSeries(
@@ -516,7 +541,7 @@ export function TradingChart({
         },
         paneIndex,
       )
-      rsiSeries.setData(toLineSeriesData(chartData.rsi))
+      rsiSeries.setData(toLineSeriesData(chartData.rsi ?? []))
       rsiSeries.createPriceLine({
         price: 70,
         color: 'rgba(148, 163, 184, 0.58)',
@@ -570,10 +595,10 @@ export function TradingChart({
         paneIndex,
       )
 
-      macdLine.setData(toLineSeriesData(chartData.macd))
-      signalLine.setData(toLineSeriesData(chartData.signal))
+      macdLine.setData(toLineSeriesData(chartData.macd ?? []))
+      signalLine.setData(toLineSeriesData(chartData.signal ?? []))
       histogram.setData(
-        chartData.histogram.map((item) => ({
+        (chartData.histogram ?? []).map((item) => ({
           time: toUtcTime(item.time),
           value: item.value,
           color:
@@ -829,6 +854,11 @@ export function TradingChart({
   const visibleTimeframes = timeframeOptions.filter((option) => preferredTimeframes.includes(option.value))
   const indicatorRows: Array<{ key: IndicatorKey; label: string; active: boolean }> = [
     { key: 'showEma', label: `EMA ${indicatorSettings.ema.periods.join('/')}`, active: indicators.showEma },
+    {
+      key: 'showBollinger',
+      label: `BOLL ${indicatorSettings.bollinger?.period ?? 20}, ${indicatorSettings.bollinger?.std_dev ?? 2}`,
+      active: indicators.showBollinger,
+    },
     { key: 'showVolume', label: 'VOL', active: indicators.showVolume },
     { key: 'showRsi', label: `RSI ${indicatorSettings.rsi.period}`, active: indicators.showRsi },
     {
@@ -3402,7 +3432,7 @@ function toCandlestickSeriesData(
 }
 
 function findValueAtTime(
-  rows: Array<{ time: number; value?: number; volume?: number }>,
+  rows: Array<{ time: number; value?: number; volume?: number }> = [],
   time: number,
   index?: Map<number, number>,
 ) {
@@ -3604,9 +3634,9 @@ function buildDataIndexes(chartData?: ChartPayload) {
         new Map(series.data.map((row) => [row.time, row.value])),
       ]),
     ),
-    rsi: new Map(chartData.rsi.map((row) => [row.time, row.value])),
-    macd: new Map(chartData.macd.map((row) => [row.time, row.value])),
-    signal: new Map(chartData.signal.map((row) => [row.time, row.value])),
+    rsi: new Map((chartData.rsi ?? []).map((row) => [row.time, row.value])),
+    macd: new Map((chartData.macd ?? []).map((row) => [row.time, row.value])),
+    signal: new Map((chartData.signal ?? []).map((row) => [row.time, row.value])),
   }
 }
 
@@ -33,6 +33,7 @@ interface ControlSidebarProps {
 
 const indicatorLabels: Array<{ key: keyof IndicatorState; label: string }> = [
   { key: 'showEma', label: 'EMA' },
+  { key: 'showBollinger', label: '布林带' },
   { key: 'showVolume', label: '成交量' },
   { key: 'showRsi', label: 'RSI' },
   { key: 'showMacd', label: 'MACD' },
@@ -60,9 +61,8 @@ function inputClassName() {
 function parsePeriodsInput(value: string) {
   const parsed = value
     .split(',')
-    .map((item) => Number(item.trim()))
-    .filter((item) => Number.isFinite(item) && item > 0)
-    .map((item) => Math.round(item))
+    .map((item) => Math.round(Number(item.trim())))
+    .filter((item) => Number.isFinite(item) && item > 0 && item <= 500)
   return parsed.length > 0 ? parsed.slice(0, 6) : [20, 50, 200]
 }
 
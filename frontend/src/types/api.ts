@@ -1,5 +1,6 @@
 export type IndicatorKey =
   | 'showEma'
+  | 'showBollinger'
   | 'showVolume'
   | 'showRsi'
   | 'showMacd'
@@ -7,10 +8,15 @@ export type IndicatorKey =
 
 export type IndicatorState = Record<IndicatorKey, boolean>
 
+export type IndicatorName = 'ema' | 'sma' | 'rsi' | 'macd' | 'bollinger' | 'atr' | 'vwap'
+
 export interface IndicatorSettings {
   ema: {
     periods: number[]
   }
+  sma?: {
+    periods: number[]
+  }
   rsi: {
     period: number
   }
@@ -19,6 +25,17 @@ export interface IndicatorSettings {
     slow_period: number
     signal_period: number
   }
+  bollinger?: {
+    period: number
+    std_dev: number
+  }
+  atr?: {
+    period: number
+  }
+  vwap?: {
+    anchor: 'day' | 'none'
+  }
+  enabled?: IndicatorName[]
 }
 
 export interface ConfigResponse {
@@ -85,14 +102,23 @@ export interface VolumeDatum {
 export interface ChartPayload {
   candlestick: CandlestickDatum[]
   volume: VolumeDatum[]
-  ema_series: Array<{
+  ema_series?: Array<{
+    period: number
+    data: ValueDatum[]
+  }>
+  sma_series?: Array<{
     period: number
     data: ValueDatum[]
   }>
-  rsi: ValueDatum[]
-  macd: ValueDatum[]
-  signal: ValueDatum[]
-  histogram: ValueDatum[]
+  rsi?: ValueDatum[]
+  macd?: ValueDatum[]
+  signal?: ValueDatum[]
+  histogram?: ValueDatum[]
+  bollinger_upper?: ValueDatum[]
+  bollinger_middle?: ValueDatum[]
+  bollinger_lower?: ValueDatum[]
+  atr?: ValueDatum[]
+  vwap?: ValueDatum[]
 }
 
 export interface PositionRecord {
@@ -144,6 +170,8 @@ export interface LoadMoreRequest {
   last_timestamp: number
   candles_to_load: number
   exchange?: string | null
+  first_timestamp?: number
+  indicator_settings?: IndicatorSettings
 }
 
 export interface LoadMoreResponse {
@@ -18,6 +18,14 @@ import csv
 import argparse
 
 from config import get_common_ccxt_config, get_env_int, get_env_str, get_position_defaults
+from backend.app.core.config import settings
+from backend.app.services.exchange import create_exchange
+from backend.app.services.markets import load_markets as load_cached_markets, share_markets
+from backend.app.services.rate_limit import install_rate_limiter
+from backend.app.services.rebuild_plan import plan_rebuild
+from backend.app.services.trade_archive import trade_archive
+from backend.app.services.trade_discovery import discover_traded_symbols, usdt_contract_symbols
+from backend.app.services.trade_windows import AdaptiveTradeFetcher, trade_window_limits
 
 # 禁用SSL警告
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -49,13 +57,18 @@ global_stats = {
     'completed_symbols': 0,
     'total_trades': 0,
     'successful_symbols': 0,
-    'failed_symbols': 0
+    'failed_symbols': 0,
+    'partial_symbols': 0
 }
 
 # 失败交易对记录
 failed_symbols_list = []
 failed_symbols_lock = threading.Lock()
 
+# 每个工作线程自己的交易所实例，以及各线程只读共享市场数据的主实例
+worker_local = threading.local()
+markets_source = None
+
 # 全局控制变量
 shutdown_flag = threading.Event()
 csv_filename = None
@@ -155,6 +168,12 @@ def initialize_exchange(exchange_name=None):
     
     logger.info(f"正在初始化交易所: {exchange_name.upper()}")
     
+    # 离线回放模式（EXCHANGE_REPLAY / EXCHANGE_REPLAY_URL）：不需要真实密钥和网络
+    if settings.exchange_replay or settings.exchange_replay_url:
+        exchange = create_exchange(exchange_name, require_auth=True)
+        logger.info(f"✅ 使用离线回放交易所: {exchange_name.upper()}")
+        return exchange
+    
     if exchange_name.lower() == 'binance':
         # 币安配置
         API_KEY = os.getenv('BINANCE_API_KEY')
@@ -176,6 +195,8 @@ def initialize_exchange(exchange_name=None):
         
         try:
             exchange = ccxt.binance(config)
+            if config['enableRateLimit']:
+                install_rate_limiter(exchange)
             exchange.load_time_difference()
             server_time = exchange.fetch_time()
             
@@ -212,6 +233,8 @@ def initialize_exchange(exchange_name=None):
         
         try:
             exchange = ccxt.okx(config)
+            if config['enableRateLimit']:
+                install_rate_limiter(exchange)
             if hasattr(exchange, 'load_time_difference'):
                 exchange.load_time_difference()
             server_time = exchange.fetch_time()
@@ -230,11 +253,26 @@ def initialize_exchange(exchange_name=None):
         raise ValueError(f"不支持的交易所: {exchange_name}，目前支持 'binance' 和 'okx'")
 
 def create_exchange_for_thread():
-    """为每个线程创建独立的交易所实例"""
-    return initialize_exchange(current_exchange_name)
+    """返回当前工作线程的交易所实例，每个线程只初始化一次，之后处理的交易对都复用它
+    
+    连接校验、时间同步只在线程首次使用时各做一次；市场数据直接引用主实例已装载的索引。
+    """
+    exchange = getattr(worker_local, 'exchange', None)
+    if exchange is None or worker_local.exchange_name != current_exchange_name:
+        exchange = initialize_exchange(current_exchange_name)
+        if markets_source is not None and markets_source.id == exchange.id:
+            share_markets(markets_source, exchange)
+        else:
+            load_cached_markets(exchange)
+        worker_local.exchange = exchange
+        worker_local.exchange_name = current_exchange_name
+    return exchange
 
-def fetch_symbol_trades(symbol, time_intervals, thread_id):
-    """获取单个交易对的所有交易数据（在独立线程中运行）"""
+def fetch_symbol_trades(symbol, time_range, thread_id):
+    """获取单个交易对的所有交易数据（在独立线程中运行）
+    
+    时间窗口按成交密度自适应切分：从交易所允许的最宽窗口开始，满页时把窗口内未返回的时间段拆出来接着查。
+    """
     global global_stats
     
     # 检查是否需要退出
@@ -242,109 +280,24 @@ def fetch_symbol_trades(symbol, time_intervals, thread_id):
         return symbol, []
     
     try:
-        # 为每个线程创建独立的exchange实例
+        # 复用当前工作线程的exchange实例，市场数据与主实例只读共享
         exchange = create_exchange_for_thread()
         
         thread_safe_log('info', f"[线程{thread_id}] 开始获取 {symbol} 的交易历史...")
         
-        symbol_trades = []
-        
-        for i, (interval_start, interval_end) in enumerate(time_intervals):
-            # 检查是否需要退出
-            if shutdown_flag.is_set():
-                thread_safe_log('info', f"[线程{thread_id}] 收到退出信号，停止处理 {symbol}")
-                break
-                
-            try:
-                limit = 1000
-                from_id = None
-                interval_trades = []
-                retry_count = 0
-                max_retries = 3
-                
-                while True:
-                    # 检查是否需要退出
-                    if shutdown_flag.is_set():
-                        break
-                        
-                    try:
-                        # 根据交易所设置不同的参数
-                        if current_exchange_name.lower() == 'binance':
-                            params = {
-                                'startTime': interval_start,
-                                'endTime': interval_end,
-                                'limit': limit
-                            }
-                            
-                            if from_id:
-                                params['fromId'] = from_id
-                                
-                        elif current_exchange_name.lower() == 'okx':
-                            # OKX API参数格式不同
-                            # 使用begin和end参数指定时间范围（以毫秒为单位）
-                            params = {
-                                'begin': str(interval_start),
-                                'end': str(interval_end),
-                                'limit': limit
-                            }
-                            
-                            # OKX不使用fromId，而是使用after参数进行分页
-                            # after参数是交易ID，用于获取该ID之后的交易
-                            if from_id:
-                                params['after'] = str(from_id)
-                        
-                        # 获取指定交易对的交易历史
-                        trades = exchange.fetch_my_trades(symbol, params=params)
-                        
-                        if not trades:
-                            break
-                            
-                        interval_trades.extend(trades)
-                        
-                        # 如果返回的记录少于限制数量，说明已经获取完毕
-                        if len(trades) < limit:
-                            break
-                            
-                        # 更新from_id为最后一条记录的ID或时间戳
-                        if current_exchange_name.lower() == 'binance':
-                            from_id = trades[-1]['id']
-                        elif current_exchange_name.lower() == 'okx':
-                            from_id = trades[-1]['timestamp']
-                        
-                        # 添加小延迟避免触发限制
-                        time.sleep(0.1 if current_exchange_name.lower() == 'okx' else 0.05)
-                        retry_count = 0  # 重置重试计数
-                        
-                    except Exception as e:
-                        error_str = str(e).lower()
-                        
-                        # 特殊处理"too many requests"错误
-                        if 'too many requests' in error_str or '429' in error_str:
-                            wait_time = 3.0 if current_exchange_name.lower() == 'okx' else 2.0
-                            thread_safe_log('warning', f"[线程{thread_id}] {symbol} 触发频率限制，暂停{wait_time}秒...")
-                            time.sleep(wait_time)
-                            continue
-                        
-                        retry_count += 1
-                        if retry_count <= max_retries:
-                            thread_safe_log('warning', f"[线程{thread_id}] {symbol} 时间段数据获取出错，重试 {retry_count}/{max_retries}: {str(e)}")
-                            time.sleep(retry_count * 0.5)  # 递增延迟
-                            continue
-                        else:
-                            thread_safe_log('warning', f"[线程{thread_id}] {symbol} 时间段数据获取失败，跳过: {str(e)}")
-                            break
-                
-                if interval_trades:
-                    symbol_trades.extend(interval_trades)
-                
-            except Exception as e:
-                thread_safe_log('warning', f"[线程{thread_id}] 处理 {symbol} 时间段 {i+1} 时出错: {str(e)}")
-                continue
+        # 单个时间窗口重试失败会抛出异常，整个交易对记为失败并交给 retry_failed_symbols 重试
+        fetcher = AdaptiveTradeFetcher(exchange, should_stop=shutdown_flag.is_set)
+        symbol_trades = fetcher.fetch(symbol, *time_range)
+        # 所有时间窗口都完整拉取后，这个交易对在窗口内的成交才能算作已完整入档
+        scan_complete = not shutdown_flag.is_set()
+        if not scan_complete:
+            thread_safe_log('info', f"[线程{thread_id}] 收到退出信号，停止处理 {symbol}")
         
         # 如果获取到交易数据，立即处理并保存
         if symbol_trades and not shutdown_flag.is_set():
             # 按时间排序
             symbol_trades.sort(key=lambda x: x['timestamp'])
+            trade_archive.save_trades(exchange.id, symbol, symbol_trades)
             
             # 重建仓位历史
             positions = rebuild_positions_from_trades(symbol_trades, symbol)
@@ -356,10 +309,12 @@ def fetch_symbol_trades(symbol, time_intervals, thread_id):
         # 更新统计信息
         with stats_lock:
             global_stats['completed_symbols'] += 1
+            if not scan_complete:
+                global_stats['partial_symbols'] += 1
             if symbol_trades:
                 global_stats['successful_symbols'] += 1
                 global_stats['total_trades'] += len(symbol_trades)
-                thread_safe_log('info', f"[线程{thread_id}] ✅ {symbol}: {len(symbol_trades)} 条记录 (进度: {global_stats['completed_symbols']}/{global_stats['total_symbols']})")
+                thread_safe_log('info', f"[线程{thread_id}] ✅ {symbol}: {len(symbol_trades)} 条记录，{fetcher.requests} 次请求 (进度: {global_stats['completed_symbols']}/{global_stats['total_symbols']})")
             else:
                 thread_safe_log('info', f"[线程{thread_id}] ⚪ {symbol}: 无记录 (进度: {global_stats['completed_symbols']}/{global_stats['total_symbols']})")
         
@@ -371,6 +326,7 @@ def fetch_symbol_trades(symbol, time_intervals, thread_id):
             failed_symbols_list.append({
                 'symbol': symbol,
                 'error': str(e),
+                'rate_limited': isinstance(e, (ccxt.RateLimitExceeded, ccxt.DDoSProtection)),
                 'thread_id': thread_id
             })
 
@@ -380,7 +336,7 @@ def fetch_symbol_trades(symbol, time_intervals, thread_id):
         thread_safe_log('error', f"[线程{thread_id}] ❌ 获取 {symbol} 交易历史失败: {str(e)}")
         return symbol, []
 
-def retry_failed_symbols(exchange, time_intervals, max_workers=5, max_retries=3):
+def retry_failed_symbols(exchange, time_range, max_workers=5, max_retries=3):
     """重试失败的交易对"""
     global failed_symbols_list, global_stats
 
@@ -405,13 +361,12 @@ def retry_failed_symbols(exchange, time_intervals, max_workers=5, max_retries=3)
         logger.info(f"\n🔄 第 {retry_count} 轮重试，处理 {len(current_failed)} 个失败的交易对")
 
         # 分析失败原因，决定重试策略
-        rate_limit_errors = sum(1 for item in current_failed if 'too many requests' in item['error'].lower() or '429' in item['error'])
+        rate_limit_errors = sum(1 for item in current_failed if item.get('rate_limited'))
         network_errors = sum(1 for item in current_failed if any(keyword in item['error'].lower() for keyword in ['timeout', 'connection', 'network']))
 
         if rate_limit_errors > 0:
-            wait_time = min(30, retry_count * 10)  # 最多等待30秒
-            logger.info(f"⏳ 检测到 {rate_limit_errors} 个限流错误，等待 {wait_time} 秒后重试...")
-            time.sleep(wait_time)
+            # 限流等待由共享限频器按 Retry-After 统一处理，不再固定休眠
+            logger.info(f"⏳ 检测到 {rate_limit_errors} 个限流错误，由限频器控制重试节奏...")
         elif network_errors > 0:
             wait_time = min(15, retry_count * 5)  # 最多等待15秒
             logger.info(f"🌐 检测到 {network_errors} 个网络错误，等待 {wait_time} 秒后重试...")
@@ -426,7 +381,7 @@ def retry_failed_symbols(exchange, time_intervals, max_workers=5, max_retries=3)
         # 使用线程池重试失败的交易对
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             future_to_symbol = {
-                executor.submit(fetch_symbol_trades, symbol, time_intervals, f"重试{retry_count}-{i}"): symbol
+                executor.submit(fetch_symbol_trades, symbol, time_range, f"重试{retry_count}-{i}"): symbol
                 for i, symbol in enumerate(retry_symbols)
             }
 
@@ -462,9 +417,14 @@ def retry_failed_symbols(exchange, time_intervals, max_workers=5, max_retries=3)
     else:
         logger.info("🎉 所有交易对都已成功处理！")
 
-def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_retries=3):
-    """获取指定时间段的仓位历史数据（多线程版本，支持失败重试）"""
-    global global_stats
+def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_retries=3, discover_symbols=True):
+    """获取指定时间段的仓位历史数据（多线程版本，支持失败重试）
+    
+    ``discover_symbols`` 为真时先通过账户流水或本地成交档案找出窗口内有成交的交易对，只扫描这些交易对；
+    无法确定时退回逐个扫描全部合约。
+    """
+    global global_stats, markets_source
+    run_started_at = int(time.time() * 1000)
     
     logger.info(f"正在获取 {start_date} 到 {end_date} 的仓位历史... (使用 {max_workers} 个线程)")
     logger.info("💡 提示: 按 Ctrl+C 可以安全退出并保存已获取的数据")
@@ -474,8 +434,9 @@ def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_re
     end_timestamp = int(datetime.strptime(end_date, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp() * 1000)
     
     try:
-        # 加载市场数据
-        exchange.load_markets()
+        # 加载市场数据（优先使用本地缓存的市场快照），工作线程的实例直接共享这份索引
+        load_cached_markets(exchange)
+        markets_source = exchange
         
         # 首先尝试获取当前仓位
         logger.info("获取当前仓位...")
@@ -484,7 +445,6 @@ def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_re
         
         # 获取所有支持的合约交易对
         logger.info("获取所有支持的合约交易对...")
-        all_futures_symbols = []
         
         # 添加调试信息：显示前10个市场的详细信息
         market_items = list(exchange.markets.items())[:10]
@@ -492,25 +452,8 @@ def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_re
         for symbol, market in market_items:
             logger.info(f"  {symbol}: type={market.get('type')}, active={market.get('active')}, info={market.get('info', {}).get('instType', 'N/A')}")
         
-        for symbol, market in exchange.markets.items():
-            # 根据不同交易所过滤交易对
-            if current_exchange_name.lower() == 'binance':
-                # 币安：过滤期货合约（通常类型为 'future' 或 'swap'，且以 :USDT 结尾）
-                if (market.get('type') in ['future', 'swap'] and 
-                    symbol.endswith(':USDT') and 
-                    market.get('active', True)):
-                    all_futures_symbols.append(symbol)
-            elif current_exchange_name.lower() == 'okx':
-                # OKX：修复过滤条件
-                market_type = market.get('type')
-                market_info = market.get('info', {})
-                inst_type = market_info.get('instType', '')
-                
-                # OKX的永续合约标识：type='swap' 或 instType='SWAP'
-                if ((market_type == 'swap' or inst_type == 'SWAP') and 
-                    market.get('active', True) and
-                    market.get('settle') == 'USDT'):  # 只获取USDT结算的合约
-                    all_futures_symbols.append(symbol)
+        # 币安：以 :USDT 结尾的期货/永续合约；OKX：USDT 结算的永续合约（type='swap' 或 instType='SWAP'）
+        all_futures_symbols = usdt_contract_symbols(exchange)
         
         logger.info(f"找到 {len(all_futures_symbols)} 个{current_exchange_name.upper()}合约交易对")
         
@@ -551,30 +494,37 @@ def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_re
             if all_futures_symbols:
                 logger.info(f"示例交易对: {all_futures_symbols[:5]}")
         
+        # 发现阶段：只扫描窗口内确实有成交的交易对（包括已下架的合约）
+        if discover_symbols:
+            traded_symbols = discover_traded_symbols(exchange, start_timestamp, end_timestamp)
+            if traded_symbols is None:
+                logger.info(f"⚠️ 无法确定有成交的交易对，逐个扫描全部 {len(all_futures_symbols)} 个合约")
+            else:
+                candidates = set(all_futures_symbols)
+                all_futures_symbols = sorted(symbol for symbol in traded_symbols if symbol in exchange.markets)
+                delisted = [symbol for symbol in all_futures_symbols if symbol not in candidates]
+                logger.info(f"🔎 发现阶段: {len(all_futures_symbols)} 个交易对在窗口内有成交，跳过其余 {len(candidates - traded_symbols)} 个合约")
+                if delisted:
+                    logger.info(f"其中 {len(delisted)} 个已不在活跃合约列表: {delisted[:5]}")
+        
         # 更新全局统计
         global_stats['total_symbols'] = len(all_futures_symbols)
         global_stats['completed_symbols'] = 0
         global_stats['successful_symbols'] = 0
         global_stats['failed_symbols'] = 0
+        global_stats['partial_symbols'] = 0
         global_stats['total_trades'] = 0
         
-        # 计算时间分段（按天分段，避免单次请求时间跨度过大）
-        time_intervals = []
-        current_time = start_timestamp
-        day_ms = 24 * 60 * 60 * 1000  # 一天的毫秒数
-        
-        while current_time < end_timestamp:
-            interval_end = min(current_time + day_ms, end_timestamp)
-            time_intervals.append((current_time, interval_end))
-            current_time = interval_end
-        
-        logger.info(f"时间分段: {len(time_intervals)} 个时间段")
+        # 每个交易对的时间窗口由 AdaptiveTradeFetcher 按成交密度自适应切分
+        time_range = (start_timestamp, end_timestamp)
+        limits = trade_window_limits(exchange)
+        logger.info(f"时间窗口: 最宽 {limits.max_window_ms / 86400000:.0f} 天，单页 {limits.page_limit} 条，按成交密度自适应切分")
         
         # 使用线程池并行获取数据
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             # 提交所有任务
             future_to_symbol = {
-                executor.submit(fetch_symbol_trades, symbol, time_intervals, i % max_workers): symbol 
+                executor.submit(fetch_symbol_trades, symbol, time_range, i % max_workers): symbol 
                 for i, symbol in enumerate(all_futures_symbols)
             }
             
@@ -593,7 +543,11 @@ def fetch_position_history(exchange, start_date, end_date, max_workers=5, max_re
         # 重试失败的交易对
         if failed_symbols_list and not shutdown_flag.is_set():
             logger.info(f"\n🔄 开始重试失败的交易对，最大重试次数: {max_retries}")
-            retry_failed_symbols(exchange, time_intervals, max_workers, max_retries)
+            retry_failed_symbols(exchange, time_range, max_workers, max_retries)
+
+        # 全部交易对都完整扫描过，这个窗口的成交已完整入档，下次可以直接从档案发现交易对
+        if not shutdown_flag.is_set() and not failed_symbols_list and global_stats['partial_symbols'] == 0:
+            trade_archive.record_complete_window(exchange.id, start_timestamp, min(end_timestamp, run_started_at))
 
         # 打印最终统计信息
         logger.info("\n" + "="*60)
@@ -738,6 +692,24 @@ def rebuild_positions_from_trades(trades, symbol):
 
     return positions
 
+def print_rebuild_plan(plan):
+    """打印重建计划：总请求数、权重、预计耗时以及各阶段的占比"""
+    logger.info("="*60)
+    logger.info(f"📋 重建计划 ({plan['exchange'].upper()} {plan['start_date']} ~ {plan['end_date']}，{plan['threads']} 个线程)")
+    logger.info(f"交易对: {plan['symbols']} 个 (依据: {plan['symbol_source']}，候选合约 {plan['candidate_symbols']} 个)")
+    logger.info(f"每个交易对时间窗口: {plan['windows_per_symbol']} 个，预计成交: {plan['estimated_trades']} 笔")
+    logger.info(f"总请求数: {plan['total_requests']}，权重: {plan['total_weight']}")
+    logger.info(f"预计耗时: {plan['estimated_seconds']:.1f} 秒 (单次请求延迟按 {plan['request_latency_ms']:.0f}ms 估算)")
+    for phase in plan['phases']:
+        logger.info(
+            f"  {phase['name']:<15} 请求 {phase['requests']:>6}  权重 {phase['weight']:>9}  "
+            f"耗时 {phase['seconds']:>7.1f}s  占比 {phase['share'] * 100:>5.1f}%  瓶颈: {phase['bottleneck']}"
+        )
+    logger.info(f"主要开销: {plan['dominant_phase']}，建议线程数: {plan['suggested_threads']}")
+    for note in plan['notes']:
+        logger.info(f"💡 {note}")
+    logger.info("="*60)
+
 def main():
     """主函数"""
     # 设置命令行参数
@@ -752,6 +724,10 @@ def main():
                         help=f"线程数量 (默认: {POSITION_DEFAULTS['threads']})")
     parser.add_argument('--max-retries', '-r', type=int, default=POSITION_DEFAULTS['max_retries'],
                         help=f"失败交易对的最大重试次数 (默认: {POSITION_DEFAULTS['max_retries']})")
+    parser.add_argument('--full-scan', action='store_true',
+                        help='跳过发现阶段，逐个扫描全部合约交易对')
+    parser.add_argument('--plan', action='store_true',
+                        help='只估算请求数、权重和耗时，不发出账户请求')
 
     args = parser.parse_args()
     
@@ -759,6 +735,11 @@ def main():
     setup_signal_handler()
     
     try:
+        if args.plan:
+            print_rebuild_plan(plan_rebuild(args.exchange, args.start_date, args.end_date,
+                                            threads=args.threads, discover_symbols=not args.full_scan))
+            return
+        
         # 初始化交易所
         exchange = initialize_exchange(args.exchange)
         
@@ -770,7 +751,8 @@ def main():
         init_csv_file(csv_filename)
         
         # 获取仓位历史
-        fetch_position_history(exchange, args.start_date, args.end_date, args.threads, args.max_retries)
+        fetch_position_history(exchange, args.start_date, args.end_date, args.threads, args.max_retries,
+                               discover_symbols=not args.full_scan)
         
         logger.info(f"✅ 任务完成！数据已保存到: {csv_filename}")
         
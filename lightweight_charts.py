@@ -22,6 +22,7 @@ from config import (
     get_env_str,
     get_server_config,
 )
+from backend.app.services.indicators import wilder_rsi
 
 CHART_DEFAULTS = get_chart_defaults()
 
@@ -580,20 +581,7 @@ def add_technical_indicators(df):
     df['ema20'] = df['close'].ewm(span=20, adjust=False).mean()
     
     # 添加RSI指标
-    delta = df['close'].diff()
-    gain = delta.where(delta > 0, 0)
-    loss = -delta.where(delta < 0, 0)
-    
-    avg_gain = gain.rolling(window=14).mean()
-    avg_loss = loss.rolling(window=14).mean()
-    
-    # 计算第一个有效值后的平均值
-    for i in range(14, len(df)):
-        avg_gain.iloc[i] = (avg_gain.iloc[i-1] * 13 + gain.iloc[i]) / 14
-        avg_loss.iloc[i] = (avg_loss.iloc[i-1] * 13 + loss.iloc[i]) / 14
-    
-    rs = avg_gain / avg_loss
-    df['rsi'] = 100 - (100 / (1 + rs))
+    df['rsi'] = wilder_rsi(df['close'], 14)
     
     # 添加布林带
     df['sma20'] = df['close'].rolling(window=20).mean()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.app.services.indicators import wilder_rsi  # noqa: E402
+
+
+def legacy_rsi(close: pd.Series, period: int) -> pd.Series:
+    """原先逐行 ``.iloc`` 读写的 RSI 实现，作为对照。"""
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+    avg_gain = gain.rolling(window=period).mean()
+    avg_loss = loss.rolling(window=period).mean()
+    for i in range(period, len(close)):
+        avg_gain.iloc[i] = (avg_gain.iloc[i - 1] * (period - 1) + gain.iloc[i]) / period
+        avg_loss.iloc[i] = (avg_loss.iloc[i - 1] * (period - 1) + loss.iloc[i]) / period
+    rs = avg_gain / avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def synthetic_close(rows: int, seed: int) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    return pd.Series(100 + rng.standard_normal(rows).cumsum() * 0.1)
+
+
+def best_of(repeat: int, func, *args) -> tuple[float, pd.Series]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="对比逐行循环与向量化 Wilder RSI 的耗时和结果差异")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--period", type=int, default=14)
+    parser.add_argument("--repeat", type=int, default=3, help="向量化实现取最快的一次")
+    parser.add_argument("--legacy-max-rows", type=int, default=0, help="超过该行数不跑逐行循环，0 表示都跑")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    print(f"{'行数':>10} {'逐行循环(s)':>12} {'向量化(s)':>10} {'加速比':>8} {'最大差异':>10}")
+    for rows in args.rows:
+        close = synthetic_close(rows, args.seed)
+        vectorized_seconds, vectorized = best_of(args.repeat, wilder_rsi, close, args.period)
+        if args.legacy_max_rows and rows > args.legacy_max_rows:
+            print(f"{rows:>10} {'-':>12} {vectorized_seconds:>10.4f} {'-':>8} {'-':>10}")
+            continue
+        legacy_seconds, legacy = best_of(1, legacy_rsi, close, args.period)
+        max_diff = float((legacy - vectorized).abs().max())
+        speedup = legacy_seconds / vectorized_seconds if vectorized_seconds else float("inf")
+        print(f"{rows:>10} {legacy_seconds:>12.3f} {vectorized_seconds:>10.4f} {speedup:>7.0f}x {max_diff:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.app.core.config import settings  # noqa: E402
+from backend.app.services.exchange import create_async_exchange  # noqa: E402
+
+# 代理收到的第一个包：SOCKS5 握手以版本号 0x05 开头，HTTP 代理收到的是 CONNECT 请求。
+EXPECTED_GREETING = {"socks5": b"\x05", "http": b"CONNECT"}
+
+
+async def first_bytes_through_proxy(scheme: str) -> bytes:
+    """在本机起一个假代理，让异步客户端经它请求一次，返回代理收到的开头几个字节。"""
+    received = asyncio.get_running_loop().create_future()
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        data = await reader.read(16)
+        if not received.done():
+            received.set_result(data)
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    settings.exchange_replay = False
+    settings.exchange_replay_url = None
+    settings.exchange_proxy_url = f"{scheme}://127.0.0.1:{port}"
+    exchange = create_async_exchange("binance")
+    exchange.timeout = 3000
+    try:
+        await exchange.fetch_time()
+    except Exception:
+        pass
+    finally:
+        await exchange.close()
+        server.close()
+        await server.wait_closed()
+    return await asyncio.wait_for(received, timeout=1)
+
+
+def main() -> None:
+    failed = False
+    for scheme, expected in EXPECTED_GREETING.items():
+        data = asyncio.run(first_bytes_through_proxy(scheme))
+        ok = data.startswith(expected)
+        failed |= not ok
+        print(f"{scheme:>7}: {'通过' if ok else '失败'}，代理收到 {data!r}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
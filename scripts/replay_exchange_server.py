@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from backend.app.services.replay_exchange import REPLAY_LIMITS, ReplayData, ReplayExchange, record_fixtures  # noqa: E402
+
+
+# 币安 U 本位合约接口的请求权重，与真实服务一致，便于验证限频器。
+ENDPOINT_WEIGHTS = {
+    "/fapi/v1/time": 1,
+    "/fapi/v1/exchangeInfo": 1,
+    "/fapi/v1/userTrades": 5,
+    "/fapi/v1/income": 30,
+    "/fapi/v2/positionRisk": 5,
+    "/fapi/v3/positionRisk": 5,
+    "/fapi/v1/allOrders": 5,
+}
+
+
+def klines_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class WeightWindow:
+    """按自然分钟累计请求权重，模拟币安的 X-MBX-USED-WEIGHT-1M 与超限后的 429。"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._minute = 0
+        self.used = 0
+
+    def charge(self, weight: int) -> tuple[int, int | None]:
+        """返回 (当前分钟已用权重, 需要等待的秒数)；超限时本次请求不计入。"""
+        with self._lock:
+            now = time.time()
+            minute = int(now // 60)
+            if minute != self._minute:
+                self._minute, self.used = minute, 0
+            if self.limit and self.used + weight > self.limit:
+                return self.used, max(int(60 - now % 60), 1)
+            self.used += weight
+            return self.used, None
+
+
+class ReplayState:
+    def __init__(self, data: ReplayData, latency_ms: float, rate_limit_every: int, weight_limit: int) -> None:
+        self.exchange = ReplayExchange("binance", "future", data=data)
+        self.exchange.load_markets()
+        self.latency_ms = latency_ms
+        self.rate_limit_every = rate_limit_every
+        self.weights = WeightWindow(weight_limit)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def next_request(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests
+
+
+def _exchange_info(state: ReplayState) -> dict:
+    symbols = []
+    for market in state.exchange.markets.values():
+        symbols.append(
+            {
+                "symbol": market["id"],
+                "pair": market["id"],
+                "contractType": "PERPETUAL",
+                "deliveryDate": 4133404800000,
+                "onboardDate": state.exchange.data.listing_ms,
+                "status": "TRADING",
+                "baseAsset": market["base"],
+                "quoteAsset": "USDT",
+                "marginAsset": "USDT",
+                "pricePrecision": 4,
+                "quantityPrecision": 3,
+                "baseAssetPrecision": 8,
+                "quotePrecision": 8,
+                "underlyingType": "COIN",
+                "settlePlan": 0,
+                "triggerProtect": "0.0500",
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "minPrice": "0.0001", "maxPrice": "1000000", "tickSize": "0.0001"},
+                    {"filterType": "LOT_SIZE", "minQty": "0.001", "maxQty": "1000000", "stepSize": "0.001"},
+                    {"filterType": "MARKET_LOT_SIZE", "minQty": "0.001", "maxQty": "1000000", "stepSize": "0.001"},
+                    {"filterType": "MIN_NOTIONAL", "notional": "5"},
+                ],
+                "orderTypes": ["LIMIT", "MARKET"],
+                "timeInForce": ["GTC", "IOC", "FOK"],
+            }
+        )
+    return {"timezone": "UTC", "serverTime": int(time.time() * 1000), "rateLimits": [], "assets": [], "symbols": symbols}
+
+
+def _klines(state: ReplayState, query: dict) -> list[list]:
+    symbol = state.exchange.markets_by_id[query["symbol"]]["symbol"]
+    params = {key: int(query[key]) for key in ("startTime", "endTime") if key in query}
+    limit = int(query.get("limit", 500))
+    rows = state.exchange.serve_ohlcv(symbol, query["interval"], params.pop("startTime", None), limit, params)
+    timeframe_ms = ReplayExchange.parse_timeframe(query["interval"]) * 1000
+    return [
+        [int(ts), f"{o:.4f}", f"{h:.4f}", f"{low:.4f}", f"{c:.4f}", f"{v:.3f}", int(ts) + timeframe_ms - 1, f"{c * v:.4f}", 10, "0", "0", "0"]
+        for ts, o, h, low, c, v in rows
+    ]
+
+
+def _user_trades(state: ReplayState, query: dict) -> list[dict]:
+    symbol = state.exchange.markets_by_id[query["symbol"]]["symbol"]
+    params = {key: int(query[key]) for key in ("startTime", "endTime", "fromId", "limit") if key in query}
+    trades = state.exchange.serve_my_trades(symbol, None, None, params)
+    return [
+        {
+            "symbol": query["symbol"],
+            "id": int(trade["id"]),
+            "orderId": int(trade["order"]),
+            "side": trade["side"].upper(),
+            "price": str(trade["price"]),
+            "qty": str(trade["amount"]),
+            "realizedPnl": "0",
+            "marginAsset": "USDT",
+            "quoteQty": str(trade["cost"]),
+            "commission": str(trade["fee"]["cost"]),
+            "commissionAsset": "USDT",
+            "time": trade["timestamp"],
+            "positionSide": "BOTH",
+            "buyer": trade["side"] == "buy",
+            "maker": False,
+        }
+        for trade in trades
+    ]
+
+
+def _income(state: ReplayState, query: dict) -> list[dict]:
+    params = {key: int(query[key]) for key in ("startTime", "endTime", "limit") if key in query}
+    return state.exchange.serve_income(params)
+
+
+def make_handler(state: ReplayState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args) -> None:
+            return None
+
+        def _send(self, status: int, payload, headers: dict | None = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, str(value))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if state.latency_ms:
+                time.sleep(state.latency_ms / 1000)
+
+            if url.path == "/fapi/v1/klines":
+                weight = klines_weight(int(query.get("limit", 500)))
+            else:
+                weight = ENDPOINT_WEIGHTS.get(url.path, 1)
+            used, retry_after = state.weights.charge(weight)
+            request_number = state.next_request()
+            if retry_after is None and state.rate_limit_every and request_number % state.rate_limit_every == 0:
+                retry_after = 1
+            if retry_after is not None:
+                self._send(
+                    429,
+                    {"code": -1003, "msg": "Too many requests; replay server rate limit."},
+                    {"Retry-After": retry_after, "X-MBX-USED-WEIGHT-1M": used},
+                )
+                return
+
+            try:
+                if url.path == "/fapi/v1/time":
+                    payload = {"serverTime": int(time.time() * 1000)}
+                elif url.path == "/fapi/v1/exchangeInfo":
+                    payload = _exchange_info(state)
+                elif url.path == "/fapi/v1/klines":
+                    payload = _klines(state, query)
+                elif url.path == "/fapi/v1/userTrades":
+                    payload = _user_trades(state, query)
+                elif url.path == "/fapi/v1/income":
+                    payload = _income(state, query)
+                elif url.path in ("/fapi/v2/positionRisk", "/fapi/v3/positionRisk", "/fapi/v1/allOrders"):
+                    payload = []
+                else:
+                    self._send(404, {"code": -5000, "msg": f"replay server does not serve {url.path}"})
+                    return
+            except KeyError as exc:
+                self._send(400, {"code": -1121, "msg": f"Invalid symbol or parameter: {exc}"})
+                return
+            except Exception as exc:
+                self._send(400, {"code": -1102, "msg": str(exc)})
+                return
+            self._send(200, payload, {"X-MBX-USED-WEIGHT-1M": used})
+
+    return Handler
+
+
+def parse_date_ms(value: str) -> int:
+    return int(datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="离线交易所回放服务：模拟币安 U 本位合约的行情、成交与限频，或录制真实数据作为夹具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    serve = subparsers.add_parser("serve", help="启动本地 HTTP 回放服务，配合 EXCHANGE_REPLAY_URL 使用")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8090)
+    serve.add_argument("--fixtures", type=Path, default=None, help="录制夹具目录，缺省时使用合成数据")
+    serve.add_argument("--latency-ms", type=float, default=50, help="每个请求的模拟网络延迟")
+    serve.add_argument("--weight-limit", type=int, default=2400, help="每分钟权重上限，0 表示不限")
+    serve.add_argument("--rate-limit-every", type=int, default=0, help="每 N 个请求强制返回一次 429")
+
+    record = subparsers.add_parser("record", help="用真实交易所录制夹具")
+    record.add_argument("--exchange", choices=["binance", "okx"], default="binance")
+    record.add_argument("--symbols", nargs="+", required=True)
+    record.add_argument("--timeframes", nargs="+", default=["1m", "1h"])
+    record.add_argument("--start-date", required=True, help="YYYY-MM-DD")
+    record.add_argument("--end-date", required=True, help="YYYY-MM-DD")
+    record.add_argument("--with-trades", action="store_true", help="同时录制账户成交（需要 API 密钥）")
+    record.add_argument("--output", type=Path, default=ROOT_DIR / "cache" / "replay")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.command == "record":
+        from backend.app.services.exchange import create_exchange
+
+        exchange = create_exchange(args.exchange, require_auth=args.with_trades)
+        record_fixtures(
+            exchange,
+            args.output,
+            args.symbols,
+            args.timeframes,
+            parse_date_ms(args.start_date),
+            parse_date_ms(args.end_date) - 1,
+            with_trades=args.with_trades,
+        )
+        print(f"夹具已保存到: {args.output}")
+        return
+
+    state = ReplayState(ReplayData(args.fixtures), args.latency_ms, args.rate_limit_every, args.weight_limit)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"回放服务已启动: http://{args.host}:{args.port} (单页上限 {REPLAY_LIMITS['binance']})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()